@@ -0,0 +1,322 @@
+"""
+build_derived.py
+
+Builds the derived weekly spatial tables (data/derived/weekly_spatial_*)
+from the weekly metrics (data/metrics/Weekly_Master_*).
+
+Responsible ONLY for:
+- Collapsing site × year × week metrics to one row per site × week
+- Dense per-week ranks of the suitability components (one pass)
+- Final decision fields (suitability_score, no_go_week, confidence)
+- Fanning builds out over windows and variable groups (process pool)
+- Writing each table atomically under the name the app loads
+
+Usage:
+    python -m app.build_derived                 # every window with data
+    python -m app.build_derived --window 2024 last4y --workers 4
+
+NO visualization logic
+NO Streamlit / Plotly imports
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from app.data_loader import (
+    DERIVED_DIR,
+    METRICS_DIR,
+    _METRIC_DATASETS,
+    _SPATIAL_DATASETS,
+    atomic_path,
+    load_sites,
+    load_weekly_metrics,
+)
+from app.ranking import rank_many_by_week
+
+
+# Site × week collapse of each metric over years
+SPATIAL_AGGREGATIONS = {
+    # Environmental means
+    "t2m_mean_08_18": "mean",
+    "rh_mean_08_18": "mean",
+    "wind_mean": "mean",
+
+    # Absolute extremes
+    "t2m_absmax_08_18": "max",
+    "t2m_absmin_08_18": "min",
+    "rh_absmax_08_18": "max",
+    "wind_absmax": "max",
+
+    # Suitability components
+    "pct_t2m_08_18": "mean",
+    "pct_rh_08_18": "mean",
+    "pct_wind_max": "mean",
+    "pct_viability": "mean",
+}
+
+# Value column -> dense per-week rank column (best = 1)
+SPATIAL_RANKS = {
+    "pct_viability": "suitability_rank",
+    "pct_t2m_08_18": "suitability_temp_rank",
+    "pct_rh_08_18": "suitability_rh_rank",
+    "pct_wind_max": "suitability_wind_rank",
+}
+
+# Ranks compare values at this precision, so means that differ only by
+# float summation noise tie whichever way they were summed (groupby
+# here, per-year partials in app.partials).
+#
+# The shipped weekly_spatial_* tables predate this and rank ties as
+# their original build did, so ranks of near-equal values can differ
+# from a rebuild (and from year windows that cover the same years)
+# until the tables are regenerated in a data refresh.
+RANK_DECIMALS = 9
+
+# Independent units of work within a window. Ranks and decision fields
+# only read the suitability components, so they stay in that group.
+VARIABLE_GROUPS = {
+    "means": ["t2m_mean_08_18", "rh_mean_08_18", "wind_mean"],
+    "extremes": [
+        "t2m_absmax_08_18",
+        "t2m_absmin_08_18",
+        "rh_absmax_08_18",
+        "wind_absmax",
+    ],
+    "suitability": [
+        "pct_t2m_08_18",
+        "pct_rh_08_18",
+        "pct_wind_max",
+        "pct_viability",
+    ],
+}
+
+_KEYS = ["site_id", "site_name", "week_bin"]
+
+
+def build_spatial_table(window: str) -> pd.DataFrame:
+    """
+    Collapse a metrics window to the ranked site × week spatial table.
+
+    Reads the metrics CSV directly (full float64 precision, not the
+    app's compact float32 schema) so ranks and ties match the source.
+    """
+    return assemble_spatial_table(
+        window,
+        {group: build_group(window, group) for group in VARIABLE_GROUPS},
+    )
+
+
+def build_group(window: str, group: str) -> pd.DataFrame:
+    """
+    One variable group of a window, collapsed to one row per site × week
+    (sorted by site_id, site_name, week_bin). Only the group's columns
+    are parsed from the CSV.
+    """
+    value_cols = VARIABLE_GROUPS[group]
+
+    metrics = load_weekly_metrics(
+        window, columns=["site_id", "week_bin", *value_cols]
+    )
+    sites = load_sites()[["site_id", "site_name"]]
+
+    df = metrics.drop(columns=["site_name"], errors="ignore").merge(
+        sites,
+        on="site_id",
+        how="left",
+        validate="many_to_one",
+    )
+
+    if df["site_name"].isna().any():
+        raise ValueError(
+            "Some site_id values could not be mapped to sites_fixed.csv"
+        )
+
+    # Collapse to ONE row per site × week
+    df = (
+        df
+        .groupby(_KEYS, as_index=False)
+        .agg({col: SPATIAL_AGGREGATIONS[col] for col in value_cols})
+    )
+
+    if group == "suitability":
+        df = add_ranks_and_decisions(df)
+
+    return df
+
+
+def add_ranks_and_decisions(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the per-week *_rank columns and the final decision fields to a
+    site × week table of suitability components.
+    """
+    # Rank every suitability component in one pass over the week groups
+    df = rank_many_by_week(
+        df, SPATIAL_RANKS, ascending=False, decimals=RANK_DECIMALS
+    )
+
+    # Final decision fields
+    df["suitability_score"] = df["pct_viability"]
+    df["no_go_week"] = df["pct_viability"] == 0
+    df["confidence"] = df["pct_viability"]
+
+    return df
+
+
+def assemble_spatial_table(
+    window: str,
+    parts: dict[str, pd.DataFrame],
+) -> pd.DataFrame:
+    """
+    Join a window's variable groups side by side into the final table.
+    """
+    keys = parts["suitability"][_KEYS]
+
+    for group, part in parts.items():
+        if not part[_KEYS].equals(keys):
+            raise ValueError(f"{window}: group '{group}' rows do not line up")
+
+    df = pd.concat(
+        [keys] + [parts[g].drop(columns=_KEYS) for g in VARIABLE_GROUPS],
+        axis=1,
+    )
+
+    if df.duplicated(subset=["site_id", "week_bin"]).any():
+        raise ValueError(f"{window}: duplicate site × week rows after collapse")
+
+    # Same column order as the notebook-built tables
+    df = df[
+        _KEYS
+        + list(SPATIAL_AGGREGATIONS)
+        + list(SPATIAL_RANKS.values())
+        + ["suitability_score", "no_go_week", "confidence"]
+    ]
+
+    # Week-major (readability, and contiguous weeks for the app)
+    return df.sort_values(
+        ["week_bin", "suitability_rank", "site_name"],
+        ignore_index=True,
+    )
+
+
+def spatial_table_path(window: str, out_dir: Path = DERIVED_DIR) -> Path:
+    if window not in _SPATIAL_DATASETS:
+        raise ValueError(f"Unknown window '{window}'")
+
+    return Path(out_dir) / _SPATIAL_DATASETS[window]
+
+
+def buildable_windows() -> list[str]:
+    """
+    Windows with both a spatial target and a metrics source on disk.
+    """
+    return [
+        window
+        for window in _SPATIAL_DATASETS
+        if window in _METRIC_DATASETS
+        and (METRICS_DIR / _METRIC_DATASETS[window]).exists()
+    ]
+
+
+def write_spatial_table(
+    window: str,
+    out_dir: Path = DERIVED_DIR,
+    df: pd.DataFrame | None = None,
+) -> Path:
+    """
+    Build one window (unless `df` is given) and replace its CSV
+    atomically: the app sees either the old file or the new one.
+    """
+    path = spatial_table_path(window, out_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if df is None:
+        df = build_spatial_table(window)
+
+    with atomic_path(path) as tmp:
+        df.to_csv(tmp, index=False)
+
+    return path
+
+
+def build_windows(
+    windows: list[str],
+    out_dir: Path = DERIVED_DIR,
+    workers: int | None = None,
+) -> dict[str, Path]:
+    """
+    Build several windows, fanning (window, group) tasks out over a
+    process pool of `workers` (default: CPU count; 1 runs inline).
+
+    Each window is assembled and written as soon as its last group
+    finishes. Returns window -> written path.
+    """
+    tasks = [(window, group) for window in windows for group in VARIABLE_GROUPS]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    parts: dict[str, dict[str, pd.DataFrame]] = {w: {} for w in windows}
+    written = {}
+
+    def collect(window, group, part):
+        parts[window][group] = part
+        if len(parts[window]) == len(VARIABLE_GROUPS):
+            df = assemble_spatial_table(window, parts.pop(window))
+            written[window] = write_spatial_table(window, out_dir, df=df)
+
+    if workers <= 1:
+        for window, group in tasks:
+            collect(window, group, build_group(window, group))
+        return written
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(build_group, window, group): (window, group)
+            for window, group in tasks
+        }
+        for future in as_completed(futures):
+            collect(*futures[future], future.result())
+
+    return written
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Rebuild the derived weekly spatial tables."
+    )
+    parser.add_argument(
+        "--window",
+        nargs="+",
+        choices=sorted(_SPATIAL_DATASETS),
+        help="Windows to build (default: every window with metrics data)",
+    )
+    parser.add_argument("--out-dir", type=Path, default=DERIVED_DIR)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes (default: CPU count; 1 builds serially)",
+    )
+    args = parser.parse_args(argv)
+
+    windows = args.window or buildable_windows()
+    if not windows:
+        print("No metrics sources found; nothing to build.", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    written = build_windows(windows, args.out_dir, workers=args.workers)
+
+    for window in windows:
+        print(f"{window}: {written[window]}")
+    print(f"Built {len(written)} windows in {time.perf_counter() - started:.2f}s")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -139,6 +139,7 @@ VARIABLES = {
         "allow_value_overlay": True,
         "allow_winner_strip": False,
         "default_overlay": "value",
+        "worst_case": "min",
     },
 
     "temperature_absmax": {
@@ -155,6 +156,7 @@ VARIABLES = {
         "allow_value_overlay": True,
         "allow_winner_strip": False,
         "default_overlay": "value",
+        "worst_case": "max",
     },
 
     # --- HUMIDITY (%) ---
@@ -188,6 +190,7 @@ VARIABLES = {
         "allow_value_overlay": True,
         "allow_winner_strip": False,
         "default_overlay": "value",
+        "worst_case": "max",
     },
 
     # --- WIND (m/s) ---
@@ -221,11 +224,27 @@ VARIABLES = {
         "allow_value_overlay": True,
         "allow_winner_strip": False,
         "default_overlay": "value",
+        "worst_case": "max",
     },
 }
 
 DEFAULT_VARIABLE_KEY = "suitability"
 
+# Site dimension columns every view needs alongside a variable.
+SITE_KEY_COLUMNS = ["site_id", "site_name", "state", "latitude", "longitude"]
+
+
+def variable_columns(variable_key: str) -> list[str]:
+    """
+    Data columns a variable reads (value column + optional rank column).
+    """
+    var_cfg = VARIABLES[variable_key]
+    return [
+        col
+        for col in (var_cfg["column"], var_cfg.get("rank_column"))
+        if col
+    ]
+
 # -----------------------------
 # OVERLAY MODES
 # -----------------------------
@@ -245,6 +264,7 @@ APP_DEFAULTS = {
     "overlay": "winner",
     "show_colorbar": True,
     "sort_sites_alphabetically": True,
+    "heatmap_page_size": 100,
 }
 
 # -----------------------------
@@ -253,6 +273,29 @@ APP_DEFAULTS = {
 
 COLORBLIND_MODE_DEFAULT = False
 
+# -----------------------------
+# PERFORMANCE
+# -----------------------------
+
+# Memory budget for built figures shared across sessions (serialised size)
+FIGURE_CACHE_MAX_MB = 64
+
+# Round figure values to display precision and send typed arrays
+COMPACT_FIGURES = True
+
+# Per-rerun timing spans (sidebar debug panel + one JSON log line)
+PROFILING_ENABLED = True
+
+# Also record net allocations per span (tracemalloc: slow, diagnosis only)
+PROFILE_ALLOCATIONS = False
+
+# Poll the data directory and drop caches of datasets whose files change
+DATA_WATCH_ENABLED = True
+DATA_WATCH_INTERVAL_S = 2.0
+
+# Reload evicted datasets (same columns, cube) right away, off-request
+DATA_WATCH_PREWARM = True
+
 COLOR_SCALE_TYPE = {
     "rdylgn": "diverging",
     "rdylbu_r": "diverging",
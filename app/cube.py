@@ -0,0 +1,344 @@
+"""
+cube.py
+
+Dense site × week × variable representation of a spatial dataset.
+
+Responsible ONLY for:
+- Building a float32[sites, weeks, variables] cube from a long table
+- Name → index lookups for sites, weeks and variables
+- Slicing site × week matrices out of the cube (views, no reshapes)
+- Week-range indexes built once per variable (prefix sums, sparse tables)
+- Per-week winner masks built once per variable
+- Per-state roll-ups of site rows
+
+NO visualization logic
+NO Streamlit / Plotly imports
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+class SiteWeekCube:
+    """
+    Contiguous float32[sites, weeks, variables] array plus its axes.
+
+    Sites are sorted by name and weeks ascending, matching
+    transforms.build_site_week_matrix. Missing site/week cells are NaN.
+    The array is read-only; build a new cube to add variables.
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        site_names: np.ndarray,
+        site_ids: np.ndarray,
+        site_states: np.ndarray,
+        weeks: np.ndarray,
+        variables: list[str],
+    ):
+        if values.shape != (len(site_names), len(weeks), len(variables)):
+            raise ValueError("Cube values do not match its axes")
+
+        values.flags.writeable = False
+
+        self.values = values
+        self.site_names = site_names
+        self.site_ids = site_ids
+        self.site_states = site_states
+        self.weeks = weeks
+        self.variables = list(variables)
+
+        self.site_index = {s: i for i, s in enumerate(site_names)}
+        self.week_index = {int(w): i for i, w in enumerate(weeks)}
+        self.variable_index = {v: i for i, v in enumerate(self.variables)}
+
+        # Lazily built per-variable indexes, keyed by (kind, *columns)
+        self._indexes: dict[tuple, object] = {}
+
+    # -----------------------------
+    # Construction
+    # -----------------------------
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        value_cols: list[str],
+    ) -> SiteWeekCube:
+        """
+        Scatter a long site/week table into a cube.
+
+        Expects at most one row per site × week (spatial datasets).
+        """
+        required = {"site_name", "site_id", "state", "week_bin", *value_cols}
+        missing = required - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing columns for cube build: {missing}")
+
+        site_pos, site_names = pd.factorize(
+            np.asarray(df["site_name"], dtype=object), sort=True
+        )
+        week_pos, weeks = pd.factorize(df["week_bin"].to_numpy(), sort=True)
+
+        n_sites, n_weeks = len(site_names), len(weeks)
+
+        cell = site_pos * n_weeks + week_pos
+        if np.bincount(cell, minlength=n_sites * n_weeks).max(initial=0) > 1:
+            raise ValueError("Cube build needs one row per site × week")
+
+        values = np.full(
+            (n_sites * n_weeks, len(value_cols)), np.nan, dtype=np.float32
+        )
+        for k, col in enumerate(value_cols):
+            values[cell, k] = df[col].to_numpy(dtype=np.float32)
+
+        # First row per site carries its dimension attributes
+        first = np.unique(site_pos, return_index=True)[1]
+
+        return cls(
+            values=values.reshape(n_sites, n_weeks, len(value_cols)),
+            site_names=np.asarray(site_names, dtype=object),
+            site_ids=df["site_id"].to_numpy()[first],
+            site_states=np.asarray(df["state"], dtype=object)[first],
+            weeks=np.asarray(weeks),
+            variables=value_cols,
+        )
+
+    def with_variables(
+        self,
+        df: pd.DataFrame,
+        value_cols: list[str],
+    ) -> SiteWeekCube:
+        """
+        Return a cube that also holds `value_cols` (built from `df`).
+        """
+        new_cols = [c for c in value_cols if c not in self.variable_index]
+        if not new_cols:
+            return self
+
+        extra = SiteWeekCube.from_frame(df, new_cols)
+        if not (
+            np.array_equal(extra.site_names, self.site_names)
+            and np.array_equal(extra.weeks, self.weeks)
+        ):
+            return SiteWeekCube.from_frame(df, self.variables + new_cols)
+
+        cube = SiteWeekCube(
+            values=np.concatenate([self.values, extra.values], axis=2),
+            site_names=self.site_names,
+            site_ids=self.site_ids,
+            site_states=self.site_states,
+            weeks=self.weeks,
+            variables=self.variables + new_cols,
+        )
+        # Existing planes are unchanged, so their indexes carry over
+        cube._indexes.update(self._indexes)
+
+        return cube
+
+    # -----------------------------
+    # Views
+    # -----------------------------
+    def has(self, value_col: str) -> bool:
+        return value_col in self.variable_index
+
+    def plane(self, value_col: str) -> np.ndarray:
+        """
+        float32[sites, weeks] view for one variable.
+        """
+        if value_col not in self.variable_index:
+            raise ValueError(f"Column '{value_col}' not in cube")
+        return self.values[:, :, self.variable_index[value_col]]
+
+    def matrix(self, value_col: str) -> pd.DataFrame:
+        """
+        Site × week matrix (same shape/labels as build_site_week_matrix).
+        """
+        return pd.DataFrame(
+            self.plane(value_col),
+            index=pd.Index(self.site_names, name="site_name"),
+            columns=pd.Index(self.weeks, name="week_bin"),
+            copy=False,
+        )
+
+    def week_positions(self, week_lo: int, week_hi: int) -> tuple[int, int]:
+        """
+        Half-open [a, b) positions on the week axis for weeks lo..hi.
+        """
+        a = int(np.searchsorted(self.weeks, week_lo, side="left"))
+        b = int(np.searchsorted(self.weeks, week_hi, side="right"))
+        return a, b
+
+    # -----------------------------
+    # Indexes
+    # -----------------------------
+    def prefix_index(self, value_col: str) -> WeekPrefixIndex:
+        """
+        Cumulative sum/count index for `value_col` (built on first use).
+        """
+        key = ("prefix", value_col)
+        if key not in self._indexes:
+            self._indexes[key] = WeekPrefixIndex(self.plane(value_col))
+        return self._indexes[key]
+
+    def range_mean(
+        self,
+        value_col: str,
+        week_lo: int,
+        week_hi: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Per-site (mean, count) of `value_col` over weeks lo..hi.
+        """
+        return self.prefix_index(value_col).range_mean(
+            *self.week_positions(week_lo, week_hi)
+        )
+
+    def extreme_index(self, value_col: str, how: str) -> RangeExtremeIndex:
+        """
+        Sparse-table range max/min index for `value_col`.
+        """
+        key = (how, value_col)
+        if key not in self._indexes:
+            self._indexes[key] = RangeExtremeIndex(self.plane(value_col), how)
+        return self._indexes[key]
+
+    def range_extreme(
+        self,
+        value_col: str,
+        week_lo: int,
+        week_hi: int,
+        how: str = "max",
+    ) -> np.ndarray:
+        """
+        Per-site max (or min) of `value_col` over weeks lo..hi.
+        """
+        return self.extreme_index(value_col, how).query(
+            *self.week_positions(week_lo, week_hi)
+        )
+
+    def winners(self, value_col: str, rank_col: str) -> np.ndarray:
+        """
+        bool[sites, weeks] winner cells (see winner_mask), built once.
+        """
+        key = ("winners", value_col, rank_col)
+        if key not in self._indexes:
+            mask = winner_mask(self.plane(rank_col), self.plane(value_col))
+            mask.flags.writeable = False
+            self._indexes[key] = mask
+        return self._indexes[key]
+
+    # -----------------------------
+    # Roll-ups
+    # -----------------------------
+    def state_rollup(
+        self,
+        value_col: str,
+        sites: list[str] | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-state weekly means of `value_col` over `sites` (default all).
+
+        Returns (states, means[states, weeks], site counts), states
+        sorted. NaN cells are skipped; a week with no data gives NaN.
+        """
+        if sites is None:
+            rows = np.arange(len(self.site_names))
+        else:
+            rows = np.array([self.site_index[s] for s in sites], dtype=np.intp)
+
+        state_pos, states = pd.factorize(self.site_states[rows], sort=True)
+        plane = self.plane(value_col)[rows]
+        valid = ~np.isnan(plane)
+
+        sums = np.zeros((len(states), len(self.weeks)), dtype=np.float64)
+        counts = np.zeros((len(states), len(self.weeks)), dtype=np.int64)
+        np.add.at(sums, state_pos, np.where(valid, plane, 0.0))
+        np.add.at(counts, state_pos, valid)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, sums / counts, np.nan)
+
+        n_sites = np.bincount(state_pos, minlength=len(states))
+
+        return np.asarray(states, dtype=object), means, n_sites
+
+
+def winner_mask(rank: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    bool[sites, weeks]: rank-1 cells, skipping weeks whose best value
+    is missing or <= 0 (nobody "wins" an all-zero week).
+    """
+    week_max = np.fmax.reduce(values, axis=0, initial=np.nan)
+
+    with np.errstate(invalid="ignore"):
+        return (rank == 1) & (week_max > 0)[None, :]
+
+
+class WeekPrefixIndex:
+    """
+    Prefix sums of a site × week plane along the week axis.
+
+    NaN cells are skipped (count towards neither sum nor count), so
+    range means match a NaN-skipping groupby mean.
+    """
+
+    def __init__(self, plane: np.ndarray):
+        valid = ~np.isnan(plane)
+        n_sites = plane.shape[0]
+
+        self.sums = np.zeros((n_sites, plane.shape[1] + 1), dtype=np.float64)
+        self.counts = np.zeros((n_sites, plane.shape[1] + 1), dtype=np.int32)
+
+        np.cumsum(np.where(valid, plane, 0.0), axis=1, out=self.sums[:, 1:])
+        np.cumsum(valid, axis=1, out=self.counts[:, 1:])
+
+    def range_mean(self, a: int, b: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Per-site (mean, count) over week positions [a, b).
+        """
+        counts = self.counts[:, b] - self.counts[:, a]
+        sums = self.sums[:, b] - self.sums[:, a]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, sums / counts, np.nan)
+
+        return means, counts
+
+
+class RangeExtremeIndex:
+    """
+    Sparse table of range maxima (or minima) along the week axis.
+
+    levels[k][:, i] holds the extreme of weeks [i, i + 2**k), so any
+    range is covered by two overlapping blocks: O(1) per site per query.
+    NaN cells are ignored; an all-NaN range gives NaN.
+    """
+
+    def __init__(self, plane: np.ndarray, how: str = "max"):
+        if how not in ("max", "min"):
+            raise ValueError(f"Unknown extreme '{how}'")
+
+        self._reduce = np.fmax if how == "max" else np.fmin
+        self.levels = [np.array(plane, dtype=np.float32)]
+
+        span = 1
+        while 2 * span <= plane.shape[1]:
+            prev = self.levels[-1]
+            self.levels.append(self._reduce(prev[:, :-span], prev[:, span:]))
+            span *= 2
+
+    def query(self, a: int, b: int) -> np.ndarray:
+        """
+        Per-site extreme over week positions [a, b).
+        """
+        n_sites = self.levels[0].shape[0]
+        if b <= a:
+            return np.full(n_sites, np.nan, dtype=np.float32)
+
+        k = (b - a).bit_length() - 1
+        level = self.levels[k]
+
+        return self._reduce(level[:, a], level[:, b - (1 << k)])
@@ -6,22 +6,42 @@ Responsible ONLY for:
 - Normalizing column names
 - Joining site metadata (sites_fixed.csv)
 - Selecting datasets by time window
+- Enforcing a compact dtype schema per dataset kind
+- Caching parsed datasets as columnar .npz files
 
 NO business logic
 NO thresholds
 NO suitability rules
 """
 
+import json
+import logging
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
 from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
+from app.profiling import profiled
+
+
+logger = logging.getLogger(__name__)
+
 
 # -----------------------------
 # Project paths
 # -----------------------------
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
-DATA_DIR = PROJECT_ROOT / "data"
+# SITE_SUITABILITY_DATA_DIR points the app at another data tree with the
+# same layout (e.g. synthetic benchmark data).
+DATA_DIR = Path(
+    os.environ.get("SITE_SUITABILITY_DATA_DIR", PROJECT_ROOT / "data")
+)
 DIMENSIONS_DIR = DATA_DIR / "dimensions"
 METRICS_DIR = DATA_DIR / "metrics"
 DERIVED_DIR = DATA_DIR / "derived"
@@ -30,6 +50,10 @@ DERIVED_DIR = DATA_DIR / "derived"
 # -----------------------------
 # Utility helpers
 # -----------------------------
+def _normalize_name(name: str) -> str:
+    return name.strip().lower().replace(" ", "_")
+
+
 def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     df.columns = (
@@ -107,15 +131,108 @@ _SPATIAL_DATASETS = {
 }
 
 
+# -----------------------------
+# Dtype schema
+# -----------------------------
+# Column name (or glob pattern) -> dtype, first match wins.
+# "*" only applies to numeric columns; unmatched text columns are kept.
+DTYPE_SCHEMAS = {
+    "spatial": {
+        "site_id": "int32",
+        "site_name": "category",
+        "state": "category",
+        "week_bin": "int16",
+        "*_rank": "int16",
+        "no_go_week": "bool",
+        "*": "float32",
+    },
+    "metrics": {
+        "site_id": "int32",
+        "site_name": "category",
+        "state": "category",
+        "year": "int16",
+        "week_bin": "int16",
+        "start_date": "category",
+        "n_obs": "int16",
+        "n_days": "int16",
+        "*": "float32",
+    },
+}
+
+
+def _schema_dtype(schema: dict, column: str, series: pd.Series) -> str | None:
+    for pattern, dtype in schema.items():
+        if pattern == "*":
+            if pd.api.types.is_bool_dtype(series.dtype):
+                return None
+            if pd.api.types.is_numeric_dtype(series.dtype):
+                return dtype
+            return None
+        if fnmatchcase(column, pattern):
+            return dtype
+    return None
+
+
+def apply_schema(df: pd.DataFrame, kind: str) -> pd.DataFrame:
+    """
+    Cast columns to the declared dtype schema for a dataset kind.
+
+    Raises ValueError if a column cannot be represented (e.g. missing
+    values in an integer column).
+    """
+    if kind not in DTYPE_SCHEMAS:
+        raise ValueError(f"No dtype schema for kind '{kind}'")
+
+    schema = DTYPE_SCHEMAS[kind]
+    dtypes = {}
+
+    for col in df.columns:
+        dtype = _schema_dtype(schema, col, df[col])
+        if dtype is not None and df[col].dtype != dtype:
+            dtypes[col] = dtype
+
+    if not dtypes:
+        return df
+
+    try:
+        return df.astype(dtypes)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(
+            f"{kind} data does not match its dtype schema: {exc}"
+        ) from exc
+
+
+def memory_footprint(df: pd.DataFrame) -> pd.Series:
+    """
+    Resident bytes per column (deep), plus a "total" entry.
+    """
+    usage = df.memory_usage(index=True, deep=True)
+    usage["total"] = usage.sum()
+    return usage
+
+
 # -----------------------------
 # Load metric data
 # -----------------------------
-def load_weekly_metrics(window: str) -> pd.DataFrame:
+def load_weekly_metrics(
+    window: str,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Raw weekly metrics (full precision). `columns` (normalized names)
+    limits parsing to those columns.
+    """
     if window not in _METRIC_DATASETS:
         raise ValueError(f"Unknown window '{window}'")
 
+    usecols = None
+    if columns is not None:
+        # Older exports call week_bin "week_index" (renamed below)
+        wanted = {*columns, "week_index"}
+        usecols = lambda name: _normalize_name(name) in wanted
+
     path = METRICS_DIR / _METRIC_DATASETS[window]
-    df = _normalize_columns(pd.read_csv(path))
+    df = _normalize_columns(pd.read_csv(path, usecols=usecols))
 
     if "week_bin" not in df.columns and "week_index" in df.columns:
         df = df.rename(columns={"week_index": "week_bin"})
@@ -139,7 +256,79 @@ def load_weekly_spatial(window: str) -> pd.DataFrame:
 # -----------------------------
 # Unified loader
 # -----------------------------
-def load_with_sites(kind: str, window: str) -> pd.DataFrame:
+@profiled()
+def load_with_sites(
+    kind: str,
+    window: str,
+    columns: list[str] | None = None,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    Load a weekly dataset with authoritative site metadata merged in.
+
+    Rows are sorted by week_bin (stable). The merged result is cached
+    as a columnar .npz file next to the source CSV and reused for as
+    long as neither the CSV nor sites_fixed.csv changes (mtime + size).
+
+    If `columns` is given, only those columns are materialised (read
+    column-by-column from the cache), in the order requested.
+    """
+    source = _dataset_path(kind, window)
+
+    if not use_cache:
+        df = _load_with_sites_csv(kind, window)
+    else:
+        cache_path = _cache_path(source)
+        signature = _cache_signature(source)
+
+        df = _read_frame_cache(cache_path, signature, columns)
+        if df is None:
+            df = _load_with_sites_csv(kind, window)
+            _write_frame_cache(df, cache_path, signature)
+
+    if columns is not None:
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"{kind}/{window} missing columns: {missing}")
+        df = df[list(columns)]
+
+    logger.info(
+        "Loaded %s/%s: %d rows, %d columns, %.2f MiB",
+        kind,
+        window,
+        len(df),
+        len(df.columns),
+        memory_footprint(df)["total"] / 2**20,
+    )
+
+    return df
+
+
+def source_signature(kind: str, window: str) -> dict:
+    """
+    Identity of the files a dataset is built from (mtime + size).
+
+    Changes whenever the source CSV or sites_fixed.csv changes.
+    """
+    return _cache_signature(_dataset_path(kind, window))
+
+
+def _dataset_path(kind: str, window: str) -> Path:
+    if kind == "metrics":
+        registry, directory = _METRIC_DATASETS, METRICS_DIR
+    elif kind == "spatial":
+        registry, directory = _SPATIAL_DATASETS, DERIVED_DIR
+    else:
+        raise ValueError("kind must be 'metrics' or 'spatial'")
+
+    if window not in registry:
+        raise ValueError(f"Unknown window '{window}'")
+
+    return directory / registry[window]
+
+
+@profiled()
+def _load_with_sites_csv(kind: str, window: str) -> pd.DataFrame:
     sites = load_sites()
 
     if kind == "metrics":
@@ -170,4 +359,173 @@ def load_with_sites(kind: str, window: str) -> pd.DataFrame:
             "Some site_id values could not be mapped to sites_fixed.csv"
         )
 
-    return df
+    # Week-major whatever the file's order (stable, so rows keep their
+    # order within a week): every dataset can then be week-partitioned
+    df = df.iloc[np.argsort(df["week_bin"].to_numpy(), kind="stable")]
+
+    return apply_schema(df.reset_index(drop=True), kind)
+
+
+# -----------------------------
+# Columnar cache (.npz)
+# -----------------------------
+# One array per column, stored uncompressed so each column can be read
+# on its own. Text columns are stored as integer codes + categories.
+# Bump the format whenever DTYPE_SCHEMAS or the row order changes.
+CACHE_FORMAT_VERSION = 3
+
+_CACHE_META_KEY = "__meta__"
+
+
+def _cache_path(source: Path) -> Path:
+    return source.with_name(f"{source.stem}.cache.npz")
+
+
+def _file_signature(path: Path) -> list[int]:
+    info = path.stat()
+    return [info.st_mtime_ns, info.st_size]
+
+
+def _cache_signature(source: Path) -> dict:
+    if not source.exists():
+        raise FileNotFoundError(f"Missing file: {source}")
+
+    return {
+        "format": CACHE_FORMAT_VERSION,
+        "source": _file_signature(source),
+        "sites": _file_signature(DIMENSIONS_DIR / "sites_fixed.csv"),
+    }
+
+
+@profiled()
+def _read_frame_cache(
+    path: Path,
+    signature: dict,
+    columns: list[str] | None = None,
+) -> pd.DataFrame | None:
+    """
+    Return the cached frame, or None if the cache is missing or stale.
+
+    Only the requested columns are read from disk.
+    """
+    if not path.exists():
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            meta = json.loads(str(npz[_CACHE_META_KEY]))
+            if meta.get("signature") != signature:
+                return None
+
+            wanted = None if columns is None else set(columns)
+            data = {}
+            for col in meta["columns"]:
+                if wanted is None or col["name"] in wanted:
+                    data[col["name"]] = _decode_column(npz, col)
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return pd.DataFrame(data, copy=False)
+
+
+@profiled()
+def _write_frame_cache(df: pd.DataFrame, path: Path, signature: dict) -> None:
+    arrays = {}
+    columns = []
+
+    for i, name in enumerate(df.columns):
+        key = f"c{i}"
+        kind = _encode_column(df[name], key, arrays)
+        columns.append({"name": name, "key": key, "kind": kind})
+
+    meta = {"signature": signature, "columns": columns}
+    arrays[_CACHE_META_KEY] = np.array(json.dumps(meta))
+
+    # The cache is an optimisation only: a read-only data directory
+    # must never break loading.
+    try:
+        with atomic_path(path) as tmp:
+            with open(tmp, "wb") as fh:
+                np.savez(fh, **arrays)
+    except OSError:
+        pass
+
+
+def _encode_column(series: pd.Series, key: str, arrays: dict) -> str:
+    if (
+        pd.api.types.is_bool_dtype(series.dtype)
+        or pd.api.types.is_numeric_dtype(series.dtype)
+    ):
+        arrays[key] = series.to_numpy()
+        return "array"
+
+    cat = pd.Categorical(series)
+    arrays[f"{key}_codes"] = cat.codes
+    arrays[f"{key}_categories"] = np.asarray(cat.categories, dtype=str)
+
+    return "category" if isinstance(series.dtype, pd.CategoricalDtype) else "text"
+
+
+def _decode_column(npz, col: dict):
+    key = col["key"]
+
+    if col["kind"] == "array":
+        return npz[key]
+
+    cat = pd.Categorical.from_codes(
+        npz[f"{key}_codes"],
+        categories=npz[f"{key}_categories"],
+    )
+
+    if col["kind"] == "category":
+        return cat
+
+    return np.asarray(cat, dtype=object)
+
+
+def _process_umask() -> int:
+    """
+    The process umask, read without changing it: os.umask can only
+    read it by setting it, which would briefly apply to every thread.
+    Falls back to the usual 0o022 where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return 0o022
+
+
+@contextmanager
+def atomic_path(path: Path):
+    """
+    Yield a temp path in the same directory that replaces `path` on success.
+
+    The new file keeps the mode of the file it replaces, or gets the
+    umask default (e.g. 0644) if there was none; mkstemp's 0600 would
+    lock out readers running as another user.
+    """
+    fd, tmp = tempfile.mkstemp(
+        dir=path.parent,
+        prefix=f".{path.name}.",
+        suffix=".tmp",
+    )
+    os.close(fd)
+    tmp = Path(tmp)
+
+    try:
+        yield tmp
+
+        try:
+            mode = stat.S_IMODE(path.stat().st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_process_umask()
+        os.chmod(tmp, mode)
+
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
@@ -0,0 +1,253 @@
+"""
+dataset.py
+
+Process-wide, read-only dataset handles.
+
+Responsible ONLY for:
+- Holding the columns loaded so far for a (kind, window) pair
+- Loading further columns on demand and merging them in
+- Reloading from scratch when the source files change
+- Building the site × week × variable cube once per dataset
+- Keeping week partition offsets for zero-copy week slicing
+- Sharing one handle per dataset across all sessions in the process
+- Evicting (and optionally reloading) handles whose sources changed
+- Keeping only the most recently used year-window handles resident
+
+Spatial windows may also be year sets ("years:2019,2022", see
+app.partials), combined from the per-year partial aggregates.
+
+Column arrays are frozen (read-only) once loaded, and frames handed out
+are zero-copy views over them. Callers must treat frames as immutable.
+
+NO business logic
+NO Streamlit / Plotly imports
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from app.config import SITE_KEY_COLUMNS
+from app.cube import SiteWeekCube
+from app.data_loader import (
+    load_with_sites,
+    memory_footprint,
+    source_signature,
+)
+from app.partials import load_year_window, parse_year_window, partials_signature
+from app.profiling import profiled
+from app.transforms import WeekPartitions, week_partitions
+
+
+# Columns every frame carries, whatever variable is being viewed.
+BASE_COLUMNS = {
+    "spatial": [*SITE_KEY_COLUMNS, "week_bin"],
+    "metrics": [*SITE_KEY_COLUMNS, "year", "week_bin"],
+}
+
+
+class Dataset:
+    """
+    Lazily projected, read-only dataset.
+
+    Starts empty; `frame(columns)` loads only the columns not seen yet.
+    Safe to share across threads.
+    """
+
+    def __init__(self, kind: str, window: str):
+        if kind not in BASE_COLUMNS:
+            raise ValueError("kind must be 'metrics' or 'spatial'")
+
+        self.kind = kind
+        self.window = window
+
+        self._years = parse_year_window(window)
+        if self._years is not None and kind != "spatial":
+            raise ValueError("Year windows are spatial datasets only")
+
+        self._columns: dict[str, np.ndarray | pd.Categorical] = {}
+        self._signature: dict | None = None
+        self._cube: SiteWeekCube | None = None
+        self._partitions: WeekPartitions | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded_columns(self) -> list[str]:
+        return list(self._columns)
+
+    def memory_footprint(self) -> pd.Series:
+        """
+        Resident bytes per loaded column (deep), plus a "total" entry;
+        the cube and indexes are not included.
+        """
+        with self._lock:
+            return memory_footprint(pd.DataFrame(self._columns, copy=False))
+
+    def version(self) -> str:
+        """
+        Token that changes whenever the dataset's source files change.
+
+        Use it in cache keys for anything derived from this dataset.
+        """
+        return json.dumps(self._source_signature(), sort_keys=True)
+
+    @profiled()
+    def frame(self, columns: list[str]) -> pd.DataFrame:
+        """
+        Return a zero-copy frame with the base columns plus `columns`.
+        """
+        with self._lock:
+            return self._view(columns)
+
+    @profiled()
+    def cube(self, columns: list[str]) -> SiteWeekCube:
+        """
+        Site × week × variable cube holding at least `columns`.
+
+        Built once per dataset and extended as new variables are asked
+        for; repeated calls for known variables cost nothing.
+        """
+        if self.kind != "spatial":
+            raise ValueError("Cubes are built from spatial datasets only")
+
+        with self._lock:
+            df = self._view(columns)
+
+            if self._cube is None:
+                self._cube = SiteWeekCube.from_frame(df, list(columns))
+            else:
+                self._cube = self._cube.with_variables(df, list(columns))
+
+            return self._cube
+
+    def week_partitions(self) -> WeekPartitions:
+        """
+        Week partition offsets for frames of this dataset (rows are
+        always loaded week-major).
+        """
+        with self._lock:
+            self._ensure_columns(BASE_COLUMNS[self.kind])
+
+            if self._partitions is None:
+                self._partitions = week_partitions(self._columns["week_bin"])
+
+            return self._partitions
+
+    def _view(self, columns: list[str]) -> pd.DataFrame:
+        wanted = list(dict.fromkeys([*BASE_COLUMNS[self.kind], *columns]))
+
+        self._ensure_columns(wanted)
+        data = {c: self._columns[c] for c in wanted}
+
+        return pd.DataFrame(data, copy=False)
+
+    def _ensure_columns(self, wanted: list[str]) -> None:
+        signature = self._source_signature()
+
+        if signature != self._signature:
+            # Source changed on disk: anything held is stale
+            self._columns = {}
+            self._cube = None
+            self._partitions = None
+            self._signature = signature
+
+        missing = [c for c in wanted if c not in self._columns]
+        if not missing:
+            return
+
+        # Every column comes from the same cache file, so rows line up
+        extra = self._load(missing)
+
+        for col in missing:
+            self._columns[col] = _freeze(extra[col])
+
+    def _source_signature(self) -> dict:
+        if self._years is not None:
+            return partials_signature()
+        return source_signature(self.kind, self.window)
+
+    def _load(self, columns: list[str]) -> pd.DataFrame:
+        if self._years is not None:
+            return load_year_window(self._years, columns=columns)
+        return load_with_sites(self.kind, self.window, columns=columns)
+
+
+def _freeze(series: pd.Series) -> np.ndarray | pd.Categorical:
+    """
+    Detach a column from its frame as a read-only array.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = np.array(series.cat.codes)
+        codes.flags.writeable = False
+        return pd.Categorical.from_codes(codes, dtype=series.dtype)
+
+    values = series.to_numpy()
+    values.flags.writeable = False
+    return values
+
+
+# -----------------------------
+# Shared handles
+# -----------------------------
+# Least recently used first
+_HANDLES: OrderedDict[tuple[str, str], Dataset] = OrderedDict()
+_HANDLES_LOCK = threading.Lock()
+
+
+def get_dataset(window: str, kind: str = "spatial") -> Dataset:
+    """
+    Return the process-wide handle for a dataset, creating it on first use.
+    """
+    with _HANDLES_LOCK:
+        key = (kind, window)
+        if key not in _HANDLES:
+            _HANDLES[key] = Dataset(kind=kind, window=window)
+        _HANDLES.move_to_end(key)
+        return _HANDLES[key]
+
+
+def evict_datasets(predicate: Callable[[str, str], bool]) -> list[Dataset]:
+    """
+    Drop the handles whose (kind, window) match `predicate`; returns
+    the evicted handles (sessions holding frames keep them alive).
+    """
+    with _HANDLES_LOCK:
+        stale = [key for key in _HANDLES if predicate(*key)]
+        return [_HANDLES.pop(key) for key in stale]
+
+
+def retire_year_windows(keep: int) -> list[Dataset]:
+    """
+    Evict all but the `keep` most recently used year-window handles.
+
+    Any year set can be asked for (2^N - 1 of them for N years), so
+    unlike registry windows they cannot all stay resident.
+    """
+    with _HANDLES_LOCK:
+        year_windows = [
+            key for key in _HANDLES if parse_year_window(key[1]) is not None
+        ]
+        stale = set(year_windows[:max(0, len(year_windows) - keep)])
+
+    return evict_datasets(lambda kind, window: (kind, window) in stale)
+
+
+def prewarm_dataset(old: Dataset) -> Dataset:
+    """
+    Load a fresh handle for an evicted one, with the same columns, cube
+    variables and week partitions already in memory.
+    """
+    dataset = get_dataset(old.window, kind=old.kind)
+
+    if old.loaded_columns:
+        dataset.frame(old.loaded_columns)
+    if old._cube is not None:
+        dataset.cube(old._cube.variables)
+    if old._partitions is not None:
+        dataset.week_partitions()
+
+    return dataset
@@ -0,0 +1,147 @@
+"""
+figure_cache.py
+
+Bounded, process-wide cache of built Plotly figures.
+
+Responsible ONLY for:
+- Storing figures as serialised JSON under a memory budget
+- Evicting least-recently-used figures once the budget is exceeded
+- Hit / miss / eviction counters for inspection
+
+Entries are immutable JSON strings, so one cached figure can be handed
+to any number of sessions; each gets its own Figure object. Figures are
+validated when built, so hits skip Plotly's (slow) re-validation.
+
+NO business logic
+NO Streamlit imports
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+
+import plotly.graph_objects as go
+
+from app.config import FIGURE_CACHE_MAX_MB
+
+
+class FigureCache:
+    """
+    LRU cache of figures, bounded by total serialised size.
+
+    Safe to share across threads. A figure larger than the whole budget
+    is returned but not stored.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> go.Figure | None:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+        return go.Figure(json.loads(payload), _validate=False)
+
+    def put(self, key: Hashable, fig: go.Figure) -> None:
+        payload = fig.to_json()
+        size = len(payload)
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = payload
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+
+    def get_or_build(
+        self,
+        key: Hashable,
+        build: Callable[[], go.Figure],
+    ) -> go.Figure:
+        """
+        Return the cached figure for `key`, building and storing it on
+        a miss. Building happens outside the lock.
+        """
+        fig = self.get(key)
+        if fig is None:
+            fig = build()
+            self.put(key, fig)
+        return fig
+
+    def evict(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Drop every entry whose key matches `predicate`; returns the count.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                self._bytes -= len(self._entries.pop(key))
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+def sequence_digest(items: Iterable) -> str:
+    """
+    Short stable digest of an ordered sequence (e.g. a site order), for
+    use in cache keys.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for item in items:
+        h.update(str(item).encode())
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+# -----------------------------
+# Shared cache
+# -----------------------------
+_FIGURE_CACHE = FigureCache(max_bytes=FIGURE_CACHE_MAX_MB * 1024 * 1024)
+
+
+def get_figure_cache() -> FigureCache:
+    """
+    Return the process-wide figure cache.
+    """
+    return _FIGURE_CACHE
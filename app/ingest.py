@@ -0,0 +1,394 @@
+"""
+ingest.py
+
+Incremental ingest of newly completed weeks.
+
+Responsible ONLY for:
+- Upserting weekly metric rows (site × year × week) into every metrics
+  CSV that covers their year
+- Re-aggregating and re-ranking only the touched weeks of the derived
+  weekly spatial tables built from those CSVs
+- Patching the touched cells of the per-year partial store, so custom
+  year windows stay current without a rebuild
+- Rebuilding the memory-mapped metric stores of the changed windows
+- Replacing each changed file atomically
+
+Files are patched line by line: untouched rows are copied through as
+text, never re-parsed or re-formatted.
+
+Everything downstream keys on file signatures (mtime + size), so only
+the windows whose files were rewritten get a new dataset version; their
+caches, cubes and figures rebuild on next use, others are untouched.
+
+Usage:
+    python -m app.ingest new_weeks.csv
+    python -m app.ingest new_weeks.csv --metrics-only
+
+NO visualization logic
+NO Streamlit / Plotly imports
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import pandas as pd
+
+from app.build_derived import (
+    SPATIAL_AGGREGATIONS,
+    add_ranks_and_decisions,
+    spatial_table_path,
+)
+from app.data_loader import (
+    METRICS_DIR,
+    _METRIC_DATASETS,
+    _SPATIAL_DATASETS,
+    _normalize_columns,
+    _normalize_name,
+    atomic_path,
+    load_sites,
+)
+from app.metric_store import refresh_metric_stores
+from app.partials import partials_signature, patch_partials
+
+
+logger = logging.getLogger(__name__)
+
+
+ROW_KEYS = ["site_id", "year", "week_bin"]
+SPATIAL_KEYS = ["site_id", "site_name", "week_bin"]
+
+
+class IngestResult(NamedTuple):
+    """
+    Files rewritten by an ingest, by window, and the weeks touched.
+    """
+
+    metrics: dict[str, Path]
+    spatial: dict[str, Path]
+    weeks: list[int]
+    partials: bool = False
+
+
+class _CsvLines(NamedTuple):
+    header: str
+    rows: list[str]
+    newline: str = "\n"
+
+
+def ingest_weeks(rows: pd.DataFrame, derived: bool = True) -> IngestResult:
+    """
+    Upsert weekly metric rows and propagate them to the derived tables.
+
+    `rows` holds complete metrics rows (same columns as the metrics
+    CSVs; "week_index" or "week_bin"). A row replaces the row with the
+    same site × year × week, or is appended. Each row goes to every
+    metrics window whose CSV already contains its year.
+
+    With `derived`, each affected window's spatial table gets its
+    touched weeks re-aggregated over all years and re-ranked. Windows
+    with a spatial table but no metrics source on disk cannot be
+    updated; they are skipped with a warning.
+
+    All new files are computed before any is written. The partial
+    store and the metric stores, where built, are brought up to date
+    afterwards, metrics-only or not: they are keyed on the metrics CSVs.
+    """
+    rows = _prepare_rows(rows)
+
+    metrics = {}
+    touched_weeks = {}
+    covered_years = set()
+    for window, name in _METRIC_DATASETS.items():
+        path = METRICS_DIR / name
+        if not path.exists():
+            continue
+
+        raw = pd.read_csv(path)
+        years = set(raw[_raw_names(raw)["year"]].unique())
+
+        hit = rows["year"].isin(years)
+        if hit.any():
+            lines = _read_lines(path, n_rows=len(raw))
+            frame, lines = _upsert(raw, lines, rows[hit])
+            metrics[window] = (path, frame, lines)
+            touched_weeks[window] = set(rows.loc[hit, "week_bin"])
+            covered_years |= years
+
+    uncovered = sorted(set(rows["year"]) - covered_years)
+    if uncovered:
+        raise ValueError(f"No metrics CSV covers years: {uncovered}")
+
+    spatial = {}
+    if derived:
+        for window, (_, frame, _) in metrics.items():
+            if window not in _SPATIAL_DATASETS:
+                continue
+
+            path = spatial_table_path(window)
+            if path.exists():
+                spatial[window] = (
+                    path,
+                    _update_spatial(path, frame, touched_weeks[window]),
+                )
+
+        for window, name in _METRIC_DATASETS.items():
+            if (
+                window in _SPATIAL_DATASETS
+                and not (METRICS_DIR / name).exists()
+                and spatial_table_path(window).exists()
+            ):
+                logger.warning(
+                    "%s: no metrics source on disk; spatial table not updated",
+                    window,
+                )
+
+    outputs = [(path, lines) for path, _, lines in metrics.values()]
+    outputs += list(spatial.values())
+
+    # The partial store is signed with the metrics CSVs being replaced
+    partials = partials_signature()
+
+    for path, lines in outputs:
+        with atomic_path(path) as tmp:
+            tmp.write_text(
+                lines.newline.join([lines.header, *lines.rows, ""]),
+                newline="",
+            )
+
+    patched = patch_partials(_written_rows(metrics, rows), partials)
+    refresh_metric_stores(list(metrics))
+
+    return IngestResult(
+        metrics={w: path for w, (path, _, _) in metrics.items()},
+        spatial={w: path for w, (path, _) in spatial.items()},
+        weeks=sorted(int(w) for w in rows["week_bin"].unique()),
+        partials=patched,
+    )
+
+
+# -----------------------------
+# Metrics upsert
+# -----------------------------
+def _prepare_rows(rows: pd.DataFrame) -> pd.DataFrame:
+    rows = _normalize_columns(rows)
+
+    if "week_bin" not in rows.columns and "week_index" in rows.columns:
+        rows = rows.rename(columns={"week_index": "week_bin"})
+
+    missing = [c for c in ROW_KEYS if c not in rows.columns]
+    if missing:
+        raise ValueError(f"Ingest rows missing key columns: {missing}")
+
+    if rows.duplicated(subset=ROW_KEYS).any():
+        raise ValueError("Ingest rows repeat a site × year × week")
+
+    unknown = set(rows["site_id"]) - set(load_sites()["site_id"])
+    if unknown:
+        raise ValueError(
+            f"site_id values not in sites_fixed.csv: {sorted(unknown)}"
+        )
+
+    return rows.reset_index(drop=True)
+
+
+def _raw_names(raw: pd.DataFrame) -> dict[str, str]:
+    """
+    Normalized name -> the CSV's own column name ("week_index" is
+    addressed as "week_bin").
+    """
+    names = {_normalize_name(c): c for c in raw.columns}
+    if "week_bin" not in names and "week_index" in names:
+        names["week_bin"] = names.pop("week_index")
+    return names
+
+
+def _read_lines(path: Path, n_rows: int) -> _CsvLines:
+    """
+    Header and data lines of a CSV, checked to be one line per parsed
+    row (`n_rows`): rows are patched by position, so a blank line or a
+    quoted newline must stop the ingest rather than shift the patch.
+    """
+    with open(path, newline="") as f:
+        text = f.read()
+
+    header, *rows = text.splitlines()
+    newline = "\r\n" if text.startswith(header + "\r\n") else "\n"
+
+    if len(rows) != n_rows:
+        raise ValueError(
+            f"{path.name}: {len(rows)} data lines but {n_rows} parsed "
+            "rows (blank lines or quoted newlines?); cannot patch it by line"
+        )
+
+    return _CsvLines(header, rows, newline)
+
+
+def _upsert(
+    raw: pd.DataFrame,
+    lines: _CsvLines,
+    rows: pd.DataFrame,
+) -> tuple[pd.DataFrame, _CsvLines]:
+    """
+    Write `rows` over matching site × year × week rows of a metrics CSV
+    (`raw` parsed, `lines` as text) and append the rest.
+
+    Returns the upserted frame and lines. The frame holds the new rows
+    as parsed back from their own CSV text, so anything derived from it
+    matches a full rebuild from the written file.
+    """
+    names = _raw_names(raw)
+
+    missing = sorted(set(names) - set(rows.columns))
+    extra = sorted(set(rows.columns) - set(names))
+    if missing or extra:
+        raise ValueError(
+            f"Ingest rows do not match the metrics columns "
+            f"(missing: {missing}, unexpected: {extra})"
+        )
+
+    text = rows.rename(columns=names)[list(raw.columns)].to_csv(index=False)
+    rows = pd.read_csv(io.StringIO(text))
+    row_lines = text.splitlines()[1:]
+
+    keys = [names[k] for k in ROW_KEYS]
+    pos = pd.MultiIndex.from_frame(raw[keys]).get_indexer(
+        pd.MultiIndex.from_frame(rows[keys])
+    )
+    hit = pos >= 0
+
+    frame = raw.copy()
+    for col in frame.columns:
+        frame.loc[pos[hit], col] = rows.loc[hit, col].to_numpy()
+    frame = pd.concat([frame, rows[~hit]], ignore_index=True)
+
+    body = list(lines.rows)
+    for line, p in zip(row_lines, pos):
+        if p >= 0:
+            body[p] = line
+    body += [line for line, p in zip(row_lines, pos) if p < 0]
+
+    return frame, lines._replace(rows=body)
+
+
+def _written_rows(metrics: dict, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    The ingested rows as written to the metrics CSVs (normalized names),
+    taken from the first window holding each, as build_partials does.
+    """
+    keys = pd.MultiIndex.from_frame(rows[ROW_KEYS])
+
+    found = []
+    for _, frame, _ in metrics.values():
+        frame = frame.rename(
+            columns={v: k for k, v in _raw_names(frame).items()}
+        )
+        hit = pd.MultiIndex.from_frame(frame[ROW_KEYS]).isin(keys)
+        found.append(frame.loc[hit])
+
+    return pd.concat(found, ignore_index=True).drop_duplicates(
+        subset=ROW_KEYS
+    )
+
+
+# -----------------------------
+# Derived spatial update
+# -----------------------------
+def _update_spatial(
+    path: Path,
+    metrics: pd.DataFrame,
+    weeks: set,
+) -> _CsvLines:
+    """
+    Lines of the spatial table at `path` with every row of `weeks`
+    rebuilt from the upserted `metrics`. Rows of other weeks are kept
+    verbatim; rebuilt weeks take the place of the old ones (new weeks
+    go last).
+
+    Ranks are per week, so a touched week is re-aggregated for all its
+    sites: cheap (one week's rows) and identical to a full rebuild.
+    """
+    metrics = metrics.rename(
+        columns={v: k for k, v in _raw_names(metrics).items()}
+    )
+    metrics = metrics.loc[metrics["week_bin"].isin(weeks)].merge(
+        load_sites()[["site_id", "site_name"]],
+        on="site_id",
+        how="left",
+        validate="many_to_one",
+    )
+
+    rebuilt = add_ranks_and_decisions(
+        metrics
+        .groupby(SPATIAL_KEYS, as_index=False)
+        .agg(SPATIAL_AGGREGATIONS)
+    ).sort_values(
+        # Same row order as build_derived
+        ["week_bin", "suitability_rank", "site_name"],
+        ignore_index=True,
+    )
+
+    old_weeks = pd.read_csv(path, usecols=["week_bin"])["week_bin"]
+    lines = _read_lines(path, n_rows=len(old_weeks))
+    columns = lines.header.split(",")
+    rebuilt_lines = rebuilt[columns].to_csv(
+        index=False, header=False
+    ).splitlines()
+
+    blocks: dict[int, list[str]] = {}
+    for week, line in zip(rebuilt["week_bin"], rebuilt_lines):
+        blocks.setdefault(week, []).append(line)
+
+    body = []
+    for week, line in zip(old_weeks, lines.rows):
+        if week not in weeks:
+            body.append(line)
+        elif week in blocks:
+            body += blocks.pop(week)
+
+    for week in sorted(blocks):
+        body += blocks[week]
+
+    return lines._replace(rows=body)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Upsert weekly metric rows and update derived tables."
+    )
+    parser.add_argument("rows", type=Path, help="CSV of weekly metric rows")
+    parser.add_argument(
+        "--metrics-only",
+        action="store_true",
+        help="Only upsert the metrics CSVs (rebuild derived tables later)",
+    )
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    result = ingest_weeks(
+        pd.read_csv(args.rows),
+        derived=not args.metrics_only,
+    )
+
+    for kind, written in (("metrics", result.metrics),
+                          ("spatial", result.spatial)):
+        for window, path in written.items():
+            print(f"{kind}/{window}: {path}")
+    if result.partials:
+        print("partials: updated")
+    print(
+        f"Ingested weeks {result.weeks} in "
+        f"{time.perf_counter() - started:.2f}s"
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
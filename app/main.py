@@ -1,4 +1,5 @@
 import sys
+from functools import partial
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
@@ -6,15 +7,38 @@ sys.path.append(str(ROOT))
 
 import streamlit as st
 
-from app.data_loader import load_with_sites
-from app.plotting import plot_heatmap
-from app.plot_map import plot_suitability_map
-from app.transforms import mean_per_site
+from app.dataset import get_dataset, retire_year_windows
+from app.figure_cache import get_figure_cache, sequence_digest
+from app.metric_store import open_metric_store
+from app.partials import (
+    YEAR_TABLE_CACHE_SIZE,
+    available_years,
+    partial_sources,
+    year_window_key,
+    year_window_label,
+)
+from app.plotting import plot_heatmap, plot_state_heatmap
+from app.plot_map import plot_suitability_map, plot_suitability_map_animated
+from app.profiling import enable_json_log, span, start_run
+from app.watcher import DataWatcher, figure_key_matcher
+from app.transforms import (
+    mean_per_site,
+    summarise_sites,
+    worst_case_per_site,
+)
 from app.config import (
     DATASETS,
     VARIABLES,
     APP_DEFAULTS,
     COLORBLIND_MODE_DEFAULT,
+    COMPACT_FIGURES,
+    DATA_WATCH_ENABLED,
+    DATA_WATCH_INTERVAL_S,
+    DATA_WATCH_PREWARM,
+    PROFILE_ALLOCATIONS,
+    PROFILING_ENABLED,
+    STATE_NAME_LOOKUP,
+    variable_columns,
 )
 
 # -----------------------------
@@ -25,6 +49,29 @@ st.set_page_config(
     layout="wide",
 )
 
+# -----------------------------
+# PROFILING
+# -----------------------------
+run_profile = None
+if PROFILING_ENABLED:
+    enable_json_log()
+    run_profile = start_run(allocations=PROFILE_ALLOCATIONS)
+
+# -----------------------------
+# DATA WATCHER
+# -----------------------------
+# One per process: drops (and reloads) only the datasets and figures
+# whose source files change, so data refreshes need no restart.
+@st.cache_resource
+def data_watcher():
+    return DataWatcher(
+        interval=DATA_WATCH_INTERVAL_S,
+        prewarm=DATA_WATCH_PREWARM,
+    ).start()
+
+
+watcher = data_watcher() if DATA_WATCH_ENABLED else None
+
 # -----------------------------
 # SIDEBAR CONTROLS
 # -----------------------------
@@ -53,12 +100,32 @@ view_mode = st.sidebar.radio(
 # -----------------------------
 # DATASET
 # -----------------------------
+CUSTOM_YEARS = "custom_years"
+
 dataset_key = st.sidebar.selectbox(
     "Dataset",
-    options=list(DATASETS.keys()),
+    options=[*DATASETS.keys(), CUSTOM_YEARS],
     index=list(DATASETS.keys()).index(APP_DEFAULTS["dataset"]),
+    format_func=lambda k: "Custom years" if k == CUSTOM_YEARS else k,
 )
 
+if dataset_key == CUSTOM_YEARS:
+    # Any year set, combined from per-year partial aggregates
+    all_years = available_years()
+    years = st.sidebar.multiselect(
+        "Years",
+        options=all_years,
+        default=all_years,
+    )
+    if not years:
+        st.warning("Select at least one year.")
+        st.stop()
+
+    dataset_key = year_window_key(years)
+    dataset_label = year_window_label(years)
+else:
+    dataset_label = DATASETS[dataset_key]["label"]
+
 # -----------------------------
 # VARIABLE
 # -----------------------------
@@ -71,16 +138,50 @@ variable_key = st.sidebar.selectbox(
 var_cfg = VARIABLES[variable_key]
 
 # -----------------------------
-# LOAD DATA (CACHED)
+# LOAD DATA (SHARED, PROJECTED)
 # -----------------------------
-@st.cache_data
-def load_data(dataset_key, _schema_version: int = 4):
-    return load_with_sites(
-        kind="spatial",
-        window=dataset_key,
+# One read-only handle per dataset for the whole process; frames are
+# zero-copy views, so reruns never copy or unpickle the data.
+def load_data(dataset_key, columns):
+    return get_dataset(dataset_key).frame(columns)
+
+
+# All weeks' map markers, built once per dataset version and shared by
+# every session; week scrubbing then happens client-side.
+def animated_map(dataset_key):
+    dataset = get_dataset(dataset_key)
+    return plot_suitability_map_animated(
+        df=dataset.frame(variable_columns("suitability")),
+        variable_key="suitability",
+        partitions=dataset.week_partitions(),
+        compact=COMPACT_FIGURES,
+    )
+
+
+# Only the active variable's columns (the map always shows suitability)
+data_columns = variable_columns(variable_key)
+if view_mode == "Map":
+    data_columns = list(
+        dict.fromkeys(data_columns + variable_columns("suitability"))
     )
 
-df = load_data(dataset_key)
+df = load_data(dataset_key, data_columns)
+
+# Only the heatmap view reads the cube
+cube = None
+if view_mode == "Heatmap":
+    cube = get_dataset(dataset_key).cube(data_columns)
+
+# Built figures are shared across sessions; keys carry the data version
+figure_cache = get_figure_cache()
+data_version = get_dataset(dataset_key).version()
+
+# Only the last few year sets stay resident, with their figures
+retired = {d.window for d in retire_year_windows(keep=YEAR_TABLE_CACHE_SIZE)}
+if retired:
+    figure_cache.evict(
+        figure_key_matcher(lambda kind, window: window in retired)
+    )
 
 # -----------------------------
 # WEEK CONTROLS
@@ -89,12 +190,19 @@ weeks_min = int(df["week_bin"].min())
 weeks_max = int(df["week_bin"].max())
 
 if view_mode == "Map":
-    selected_week = st.sidebar.slider(
-        "Week",
-        min_value=weeks_min,
-        max_value=weeks_max,
-        value=weeks_min,
+    scrub_in_browser = st.sidebar.toggle(
+        "Scrub weeks in chart",
+        value=True,
+        help="Preloads every week so the map's own slider needs no reload.",
     )
+
+    if not scrub_in_browser:
+        selected_week = st.sidebar.slider(
+            "Week",
+            min_value=weeks_min,
+            max_value=weeks_max,
+            value=weeks_min,
+        )
 else:
     week_range = st.sidebar.slider(
         "Weeks",
@@ -127,12 +235,22 @@ if view_mode == "Heatmap":
         else overlay_options[0]
     )
 
-    overlay_key = st.sidebar.selectbox(
-        "Overlay",
-        options=overlay_options,
-        index=overlay_options.index(default_overlay),
+    chart_toggles = st.sidebar.toggle(
+        "Overlay & palette buttons in chart",
+        value=True,
+        help="Switch overlays and the colourblind palette in the chart "
+        "itself, without reloading.",
     )
 
+    if chart_toggles:
+        overlay_key = default_overlay
+    else:
+        overlay_key = st.sidebar.selectbox(
+            "Overlay",
+            options=overlay_options,
+            index=overlay_options.index(default_overlay),
+        )
+
     show_colorbar = st.sidebar.checkbox(
         "Show colorbar",
         value=APP_DEFAULTS.get("show_colorbar", True),
@@ -159,20 +277,27 @@ if view_mode == "Heatmap":
     # -----------------------------
     st.sidebar.subheader("Site prioritisation")
 
+    sort_options = [
+        "Alphabetical",
+        "State → Site (A–Z)",
+        "Mean suitability",
+    ]
+
+    # Absolute-extreme variables can also be ranked by their worst week
+    worst_case = var_cfg.get("worst_case")
+    if worst_case:
+        sort_options.append("Worst case")
+
     sort_mode = st.sidebar.radio(
         "Order sites by",
-        options=[
-            "Alphabetical",
-            "State → Site (A–Z)",
-            "Mean suitability",
-        ],
+        options=sort_options,
         index=0,
     )
 
     summary_df = None
     site_order = None
 
-    if sort_mode == "Mean suitability":
+    if sort_mode in ("Mean suitability", "Worst case"):
         top_n = st.sidebar.slider(
             "Show top N sites",
             min_value=5,
@@ -181,24 +306,37 @@ if view_mode == "Heatmap":
             step=5,
         )
 
-        scores = mean_per_site(
+        summary_agg = "mean" if sort_mode == "Mean suitability" else worst_case
+
+        if summary_agg == "mean":
+            scores = mean_per_site(
+                df=df,
+                value_col=var_cfg["column"],
+                weeks=active_weeks,
+                cube=cube,
+            )
+        else:
+            scores = worst_case_per_site(
+                df=df,
+                value_col=var_cfg["column"],
+                how=worst_case,
+                weeks=active_weeks,
+                cube=cube,
+            )
+
+        site_order = scores.head(top_n).index.tolist()
+        active_sites = set(site_order)
+
+        summary_df = summarise_sites(
             df=df,
             value_col=var_cfg["column"],
+            sites=site_order,
             weeks=active_weeks,
-        ).head(top_n)
-
-        site_order = scores.index.tolist()
-        active_sites = set(site_order)
-
-        summary_df = (
-            df[df["site_name"].isin(site_order)]
-            .loc[df["week_bin"].isin(active_weeks)]
-            .groupby(["state", "site_name"], as_index=False)[var_cfg["column"]]
-            .agg(mean="mean", weeks="count")
-            .sort_values("mean", ascending=False)
+            cube=cube,
+            agg=summary_agg,
         )
 
-        summary_df["mean"] = summary_df["mean"].round(3)
+        summary_df[summary_agg] = summary_df[summary_agg].round(3)
 
     elif sort_mode == "State → Site (A–Z)":
         site_order = (
@@ -214,39 +352,220 @@ if view_mode == "Heatmap":
         site_order = sorted(active_sites)
 
     # -----------------------------
-    # HEATMAP
+    # LEVEL OF DETAIL
     # -----------------------------
-    fig = plot_heatmap(
-        df=df,
-        variable_key=variable_key,
-        overlay_key=overlay_key,
-        active_weeks=active_weeks,
-        active_sites=active_sites,
-        site_order=site_order,
-        show_colorbar=show_colorbar,
-        dataset_label=DATASETS[dataset_key]["label"],
+    row_detail = st.sidebar.radio(
+        "Rows",
+        options=["Sites", "States"],
+        index=0,
+        horizontal=True,
+        help="States rolls sites up into one row per state; "
+        "expand a state to list its sites.",
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    if row_detail == "States":
+        state_options = list(dict.fromkeys(
+            cube.site_states[cube.site_index[s]] for s in site_order
+        ))
+        expanded_states = st.sidebar.multiselect(
+            "Expand states",
+            options=state_options,
+            format_func=lambda code: STATE_NAME_LOOKUP.get(code, code),
+        )
+    else:
+        # Only the visible page of rows is built and sent
+        page_size = APP_DEFAULTS.get("heatmap_page_size", 100)
+        n_pages = max(1, -(-len(site_order) // page_size))
+
+        if n_pages > 1:
+            page = st.sidebar.number_input(
+                f"Page (of {n_pages})",
+                min_value=1,
+                max_value=n_pages,
+                value=1,
+            )
+            site_order = site_order[(page - 1) * page_size:page * page_size]
+
+    # -----------------------------
+    # HEATMAP
+    # -----------------------------
+    if row_detail == "States":
+        heatmap_key = (
+            "states",
+            dataset_key,
+            data_version,
+            variable_key,
+            overlay_key,
+            tuple(overlay_options) if chart_toggles else None,
+            week_range,
+            sequence_digest(site_order),
+            tuple(expanded_states),
+            st.session_state["colourblind"],
+            show_colorbar,
+        )
+        build_heatmap = partial(
+            plot_state_heatmap,
+            cube=cube,
+            variable_key=variable_key,
+            overlay_key=overlay_key,
+            active_weeks=active_weeks,
+            site_order=site_order,
+            expanded_states=expanded_states,
+            show_colorbar=show_colorbar,
+            dataset_label=dataset_label,
+            overlay_options=overlay_options if chart_toggles else None,
+            compact=COMPACT_FIGURES,
+        )
+    else:
+        heatmap_key = (
+            "heatmap",
+            dataset_key,
+            data_version,
+            variable_key,
+            overlay_key,
+            tuple(overlay_options) if chart_toggles else None,
+            week_range,
+            sequence_digest(site_order),
+            sequence_digest(sorted(active_sites)),
+            st.session_state["colourblind"],
+            show_colorbar,
+        )
+        build_heatmap = partial(
+            plot_heatmap,
+            df=df,
+            variable_key=variable_key,
+            overlay_key=overlay_key,
+            active_weeks=active_weeks,
+            active_sites=active_sites,
+            site_order=site_order,
+            show_colorbar=show_colorbar,
+            dataset_label=dataset_label,
+            cube=cube,
+            overlay_options=overlay_options if chart_toggles else None,
+            compact=COMPACT_FIGURES,
+        )
+
+    with span("figure_cache.get_or_build"):
+        fig = figure_cache.get_or_build(heatmap_key, build_heatmap)
+
+    with span("streamlit.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
 
     # -----------------------------
     # SUMMARY TABLE
     # -----------------------------
     if summary_df is not None:
-        st.subheader("Top sites by mean suitability")
+        st.subheader(
+            "Top sites by mean suitability"
+            if sort_mode == "Mean suitability"
+            else f"Top sites by worst-case {var_cfg['label'].lower()}"
+        )
         st.dataframe(summary_df, use_container_width=True, hide_index=True)
 
+    # -----------------------------
+    # YEAR-BY-YEAR DRILL-DOWN
+    # -----------------------------
+    # Reads one site's slice of the memory-mapped metrics store, so
+    # long multi-year windows never load whole into the worker. Opt-in:
+    # an expander's body runs on every rerun, even collapsed. Stale
+    # stores are rebuilt by ingest and the data watcher, not here.
+    if dataset_key in partial_sources() and st.toggle(
+        f"Year by year: {var_cfg['label']}"
+    ):
+        drill_site = st.selectbox(
+            "Site",
+            options=all_sites,
+            index=all_sites.index(site_order[0]) if site_order else 0,
+        )
+
+        with span("metric_store.drill_down"):
+            store = open_metric_store(dataset_key)
+            history = store.to_frame(
+                var_cfg["column"],
+                site=cube.site_ids[cube.site_index[drill_site]],
+            )
+
+        st.line_chart(
+            history.pivot(
+                index="week_bin", columns="year", values=var_cfg["column"]
+            ),
+            x_label="Week",
+            y_label=var_cfg["label"],
+        )
+
 # -----------------------------
 # MAP VIEW
 # -----------------------------
 else:
-    fig = plot_suitability_map(
-        df=df,
-        variable_key="suitability",  # map uses overall suitability only
-        week=selected_week,
+    if scrub_in_browser:
+        with span("figure_cache.get_or_build"):
+            fig = figure_cache.get_or_build(
+                ("map_anim", dataset_key, data_version),
+                partial(animated_map, dataset_key),
+            )
+    else:
+        with span("figure_cache.get_or_build"):
+            fig = figure_cache.get_or_build(
+                ("map", dataset_key, data_version, selected_week),
+                lambda: plot_suitability_map(
+                    df=df,
+                    variable_key="suitability",  # map uses overall suitability only
+                    week=selected_week,
+                    partitions=get_dataset(dataset_key).week_partitions(),
+                    compact=COMPACT_FIGURES,
+                ),
+            )
+
+    with span("streamlit.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+# -----------------------------
+# DEBUG PANEL (CACHE + TIMINGS)
+# -----------------------------
+with st.sidebar.expander("Debug"):
+    stats = figure_cache.stats()
+    st.caption(
+        f"Figure cache: {stats['entries']} figures · "
+        f"{stats['bytes'] / 1e6:.1f} / {stats['max_bytes'] / 1e6:.0f} MB · "
+        f"hit rate {stats['hit_rate']:.0%}"
+    )
+    st.json(stats, expanded=False)
+
+    footprint = get_dataset(dataset_key).memory_footprint()
+    st.caption(
+        f"Dataset {dataset_label}: {len(footprint) - 2} columns · "
+        f"{footprint['total'] / 2**20:.2f} MiB resident"
+    )
+    st.json(
+        {col: int(n) for col, n in footprint.drop(["Index", "total"]).items()},
+        expanded=False,
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    if watcher is not None:
+        watch = watcher.stats()
+        st.caption(
+            f"Data watcher: {'running' if watch['running'] else 'stopped'}"
+            f" · {watch['files']} files every {watch['interval_s']:g}s · "
+            f"{len(watch['recent_changes'])} recent changes"
+        )
+        if watch["recent_changes"]:
+            st.json(watch["recent_changes"], expanded=False)
+
+    if run_profile is not None and st.toggle("Show timings"):
+        st.caption(f"This run so far: {run_profile.elapsed_ms:.0f} ms")
+        st.dataframe(
+            [
+                {
+                    "stage": "  " * s["depth"] + s["name"],
+                    "ms": s["ms"],
+                    "rows": s["rows"],
+                    **({"alloc_kb": s["alloc_kb"]} if "alloc_kb" in s else {}),
+                }
+                for s in run_profile.spans
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
 
 # -----------------------------
 # FOOTER
@@ -265,3 +584,6 @@ st.sidebar.markdown(
     """,
     unsafe_allow_html=True,
 )
+
+if run_profile is not None:
+    run_profile.finish()
@@ -0,0 +1,294 @@
+"""
+metric_store.py
+
+Persistent, memory-mapped site × year × week × metric arrays.
+
+Responsible ONLY for:
+- Writing metric datasets as float32 .npy arrays with a JSON sidecar
+- Opening them via np.memmap so a drill-down only touches its pages
+- Label-based selection by site / year / week / metric
+- Rebuilding stale stores ahead of use (ingest, data watcher)
+
+NO business logic
+NO Streamlit / Plotly imports
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.data_loader import (
+    METRICS_DIR,
+    _METRIC_DATASETS,
+    atomic_path,
+    load_with_sites,
+    source_signature,
+)
+
+
+STORE_FORMAT_VERSION = 1
+
+# Axis order on disk: one site's history is contiguous.
+METRIC_STORE_AXES = ("site_id", "year", "week_bin", "metric")
+
+# Identity / bookkeeping columns that are not stored as metrics
+_NON_METRIC_COLUMNS = {
+    "site_id",
+    "year",
+    "week_bin",
+    "latitude",
+    "longitude",
+    "n_obs",
+    "n_days",
+}
+
+
+# -----------------------------
+# Generic array store
+# -----------------------------
+def write_array_store(
+    path: Path,
+    values: np.ndarray,
+    axes: dict[str, list],
+    signature: dict | None = None,
+) -> None:
+    """
+    Write `values` as <path>.npy with axis labels in <path>.json.
+
+    Both files are written atomically; the sidecar goes last, so a
+    reader never sees labels for an incomplete array.
+    """
+    path = Path(path)
+    if values.shape != tuple(len(v) for v in axes.values()):
+        raise ValueError("Store values do not match their axes")
+
+    npy_path, meta_path = _store_files(path)
+
+    with atomic_path(npy_path) as tmp:
+        with open(tmp, "wb") as fh:
+            np.save(fh, values, allow_pickle=False)
+
+    meta = {
+        "format": STORE_FORMAT_VERSION,
+        "signature": signature,
+        "dtype": str(values.dtype),
+        "shape": list(values.shape),
+        "axes": {
+            name: [_jsonable(v) for v in labels]
+            for name, labels in axes.items()
+        },
+    }
+    with atomic_path(meta_path) as tmp:
+        tmp.write_text(json.dumps(meta))
+
+
+def read_array_store(path: Path) -> tuple[np.ndarray, dict] | None:
+    """
+    Open a store as a read-only memmap.
+
+    Returns (memmap, meta), or None if the store is missing/unreadable.
+    """
+    npy_path, meta_path = _store_files(Path(path))
+    if not (npy_path.exists() and meta_path.exists()):
+        return None
+
+    try:
+        meta = json.loads(meta_path.read_text())
+        values = np.load(npy_path, mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("format") != STORE_FORMAT_VERSION:
+        return None
+    if list(values.shape) != meta["shape"]:
+        return None
+
+    return values, meta
+
+
+def _store_files(path: Path) -> tuple[Path, Path]:
+    return (
+        path.with_name(f"{path.name}.npy"),
+        path.with_name(f"{path.name}.json"),
+    )
+
+
+def _jsonable(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# -----------------------------
+# Metric store
+# -----------------------------
+class MetricStore:
+    """
+    Memory-mapped float32[site, year, week, metric] array.
+
+    Missing site/year/week cells are NaN. Selections return views of
+    the memmap where possible, so only the touched pages are read.
+    """
+
+    def __init__(self, values: np.ndarray, axes: dict[str, list]):
+        self.values = values
+
+        self.site_ids = np.asarray(axes["site_id"])
+        self.years = np.asarray(axes["year"])
+        self.weeks = np.asarray(axes["week_bin"])
+        self.metrics = list(axes["metric"])
+
+        self._index = {
+            name: {label: i for i, label in enumerate(labels)}
+            for name, labels in axes.items()
+        }
+
+    def sel(
+        self,
+        site=None,
+        year=None,
+        week=None,
+        metric=None,
+    ) -> np.ndarray:
+        """
+        Select by label. Each argument may be None (all), a single
+        label (axis dropped) or a list of labels.
+        """
+        selection = self.values
+
+        # Index the last axis first so earlier axis numbers stay valid
+        # when a scalar label drops a dimension. Scalars and slices give
+        # memmap views; label lists copy only the rows they pick.
+        requests = zip(METRIC_STORE_AXES, (site, year, week, metric))
+        for axis, (name, labels) in reversed(list(enumerate(requests))):
+            pos = self._positions(name, labels)
+            if isinstance(pos, list):
+                selection = np.take(selection, pos, axis=axis)
+            else:
+                selection = selection[(slice(None),) * axis + (pos,)]
+
+        return selection
+
+    def to_frame(self, metric: str, site=None, year=None) -> pd.DataFrame:
+        """
+        Long site/year/week table of one metric for a drill-down.
+        """
+        sites = self.site_ids if site is None else np.atleast_1d(site)
+        years = self.years if year is None else np.atleast_1d(year)
+
+        block = self.sel(site=list(sites), year=list(years), metric=metric)
+        s, y, w = np.meshgrid(
+            sites, years, self.weeks, indexing="ij"
+        )
+
+        return pd.DataFrame(
+            {
+                "site_id": s.ravel(),
+                "year": y.ravel(),
+                "week_bin": w.ravel(),
+                metric: np.asarray(block).ravel(),
+            }
+        ).dropna(subset=[metric])
+
+    def _positions(self, axis: str, labels):
+        if labels is None:
+            return slice(None)
+
+        index = self._index[axis]
+        try:
+            if isinstance(labels, (list, tuple, np.ndarray)):
+                return [index[_jsonable(v)] for v in labels]
+            return index[_jsonable(labels)]
+        except KeyError as exc:
+            raise KeyError(f"Unknown {axis} {exc.args[0]!r}") from None
+
+
+def metric_store_path(window: str) -> Path:
+    if window not in _METRIC_DATASETS:
+        raise ValueError(f"Unknown window '{window}'")
+
+    return METRICS_DIR / f"{Path(_METRIC_DATASETS[window]).stem}.store"
+
+
+def build_metric_store(window: str) -> MetricStore:
+    """
+    (Re)build the on-disk store for a metrics window from its CSV.
+    """
+    signature = source_signature("metrics", window)
+    df = load_with_sites(kind="metrics", window=window)
+
+    metrics = [
+        col
+        for col in df.columns
+        if col not in _NON_METRIC_COLUMNS
+        and pd.api.types.is_float_dtype(df[col].dtype)
+    ]
+
+    site_pos, site_ids = pd.factorize(df["site_id"], sort=True)
+    year_pos, years = pd.factorize(df["year"], sort=True)
+    week_pos, weeks = pd.factorize(df["week_bin"], sort=True)
+
+    values = np.full(
+        (len(site_ids), len(years), len(weeks), len(metrics)),
+        np.nan,
+        dtype=np.float32,
+    )
+    values[site_pos, year_pos, week_pos, :] = df[metrics].to_numpy(
+        dtype=np.float32
+    )
+
+    axes = {
+        "site_id": list(site_ids),
+        "year": list(years),
+        "week_bin": list(weeks),
+        "metric": metrics,
+    }
+    write_array_store(metric_store_path(window), values, axes, signature)
+
+    return open_metric_store(window, rebuild=False)
+
+
+def open_metric_store(window: str, rebuild: bool = True) -> MetricStore:
+    """
+    Open the memory-mapped store for a metrics window.
+
+    A missing or stale store (source CSV / sites_fixed.csv changed) is
+    rebuilt when `rebuild` is True, otherwise FileNotFoundError.
+    """
+    stored = read_array_store(metric_store_path(window))
+
+    if stored is not None:
+        values, meta = stored
+        if meta.get("signature") == source_signature("metrics", window):
+            return MetricStore(values, meta["axes"])
+
+    if not rebuild:
+        raise FileNotFoundError(f"No up-to-date metric store for '{window}'")
+
+    return build_metric_store(window)
+
+
+def refresh_metric_stores(windows=None) -> list[str]:
+    """
+    Rebuild the stores (of `windows`, default all) that exist on disk
+    but whose source changed, so no request has to; returns their
+    windows. Stores never built are left to open_metric_store.
+    """
+    refreshed = []
+
+    for window in _METRIC_DATASETS if windows is None else windows:
+        stored = read_array_store(metric_store_path(window))
+        if stored is None:
+            continue
+
+        source = METRICS_DIR / _METRIC_DATASETS[window]
+        if not source.exists():
+            continue
+
+        if stored[1].get("signature") != source_signature("metrics", window):
+            build_metric_store(window)
+            refreshed.append(window)
+
+    return refreshed
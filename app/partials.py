@@ -0,0 +1,401 @@
+"""
+partials.py
+
+Mergeable per-(site, year, week) partial aggregates, and spatial tables
+for any set of years built from them.
+
+Responsible ONLY for:
+- Collecting every yearly metrics row on disk (all metrics windows)
+- Storing sum / count / min / max per site × year × week × metric as a
+  memory-mapped array store
+- Combining any year set into a weekly spatial table, in
+  O(years × sites × weeks), with the same columns, ranks and decision
+  fields as app.build_derived builds (see RANK_DECIMALS for how the
+  shipped tables' tie ranks can differ)
+
+Year windows are addressed by keys such as "years:2019,2020,2022"; see
+year_window_key / parse_year_window.
+
+NO visualization logic
+NO Streamlit / Plotly imports
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from app.build_derived import SPATIAL_AGGREGATIONS, add_ranks_and_decisions
+from app.data_loader import (
+    DIMENSIONS_DIR,
+    METRICS_DIR,
+    _METRIC_DATASETS,
+    _file_signature,
+    apply_schema,
+    load_sites,
+    load_weekly_metrics,
+)
+from app.metric_store import read_array_store, write_array_store
+
+
+PARTIALS_FORMAT_VERSION = 1
+PARTIALS_PATH = METRICS_DIR / "weekly_partials.store"
+
+PARTIAL_AXES = ("site_id", "year", "week_bin", "metric", "stat")
+PARTIAL_STATS = ("sum", "count", "min", "max")
+
+# Metrics kept as partials: everything the spatial tables aggregate
+PARTIAL_METRICS = list(SPATIAL_AGGREGATIONS)
+
+YEAR_WINDOW_PREFIX = "years:"
+
+# Year sets whose combined table is kept in memory
+YEAR_TABLE_CACHE_SIZE = 4
+
+
+# -----------------------------
+# Year window keys
+# -----------------------------
+def year_window_key(years) -> str:
+    return YEAR_WINDOW_PREFIX + ",".join(str(y) for y in sorted(set(years)))
+
+
+def parse_year_window(window: str) -> list[int] | None:
+    """
+    Years of a "years:..." window key; None for registry windows.
+    """
+    if not window.startswith(YEAR_WINDOW_PREFIX):
+        return None
+
+    years = window[len(YEAR_WINDOW_PREFIX):]
+    if not years:
+        raise ValueError("Year window needs at least one year")
+
+    return sorted({int(y) for y in years.split(",")})
+
+
+def year_window_label(years) -> str:
+    """
+    Human label with contiguous runs collapsed ("2019–2022, 2024").
+    """
+    years = sorted(set(years))
+    runs = []
+    for year in years:
+        if runs and year == runs[-1][1] + 1:
+            runs[-1][1] = year
+        else:
+            runs.append([year, year])
+
+    return ", ".join(
+        str(lo) if lo == hi else f"{lo}–{hi}" for lo, hi in runs
+    )
+
+
+# -----------------------------
+# Partial store
+# -----------------------------
+class PartialStore:
+    """
+    Memory-mapped float64[site, year, week, metric, stat] partials.
+
+    Missing cells have sum = count = 0 and min = max = NaN, so they
+    merge away without special cases.
+    """
+
+    def __init__(self, values: np.ndarray, axes: dict[str, list]):
+        self.values = values
+
+        self.site_ids = np.asarray(axes["site_id"])
+        self.years = [int(y) for y in axes["year"]]
+        self.weeks = np.asarray(axes["week_bin"])
+        self.metrics = list(axes["metric"])
+
+        self._year_index = {y: i for i, y in enumerate(self.years)}
+        self._metric_index = {m: i for i, m in enumerate(self.metrics)}
+        self._stat_index = {s: i for i, s in enumerate(axes["stat"])}
+
+    def combine(self, years) -> pd.DataFrame:
+        """
+        Site × week table of every metric aggregated over `years`
+        (means from sums / counts, extremes from min / max).
+
+        Only site × week cells with data in at least one year are kept.
+        """
+        missing = sorted(set(years) - set(self._year_index))
+        if missing:
+            raise ValueError(f"No partials for years: {missing}")
+
+        pos = sorted(self._year_index[y] for y in set(years))
+        block = self.values[:, pos]  # sites, years, weeks, metrics, stats
+
+        counts = block[..., self._stat_index["count"]].sum(axis=1)
+        has_data = (counts > 0).any(axis=2)
+        site_pos, week_pos = np.nonzero(has_data)
+
+        data = {
+            "site_id": self.site_ids[site_pos],
+            "week_bin": self.weeks[week_pos],
+        }
+
+        for metric, how in SPATIAL_AGGREGATIONS.items():
+            m = self._metric_index[metric]
+
+            if how == "mean":
+                sums = block[..., m, self._stat_index["sum"]].sum(axis=1)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    plane = np.where(
+                        counts[..., m] > 0, sums / counts[..., m], np.nan
+                    )
+            else:
+                reduce = np.fmax if how == "max" else np.fmin
+                plane = reduce.reduce(
+                    block[..., m, self._stat_index[how]], axis=1
+                )
+
+            data[metric] = plane[site_pos, week_pos]
+
+        return pd.DataFrame(data)
+
+
+def partial_sources() -> list[str]:
+    """
+    Metrics windows with a CSV on disk, in registry order.
+    """
+    return [
+        window
+        for window, name in _METRIC_DATASETS.items()
+        if (METRICS_DIR / name).exists()
+    ]
+
+
+def partials_signature() -> dict:
+    """
+    Identity of every file the partials are built from (mtime + size).
+    """
+    return {
+        "format": PARTIALS_FORMAT_VERSION,
+        "sources": {
+            window: _file_signature(METRICS_DIR / _METRIC_DATASETS[window])
+            for window in partial_sources()
+        },
+        "sites": _file_signature(DIMENSIONS_DIR / "sites_fixed.csv"),
+    }
+
+
+def build_partials() -> PartialStore:
+    """
+    (Re)build the partial store from every metrics CSV on disk.
+
+    Windows overlap (e.g. last4y contains 2024); a site × year × week
+    present in several files is taken once.
+    """
+    signature = partials_signature()
+    if not signature["sources"]:
+        raise FileNotFoundError(f"No metrics CSVs in {METRICS_DIR}")
+
+    keys = ["site_id", "year", "week_bin"]
+    df = pd.concat(
+        [
+            load_weekly_metrics(window, columns=keys + PARTIAL_METRICS)
+            for window in signature["sources"]
+        ],
+        ignore_index=True,
+    ).drop_duplicates(subset=keys, keep="first")
+
+    stats = (
+        df.groupby(keys)[PARTIAL_METRICS]
+        .agg(list(PARTIAL_STATS))
+        .reset_index()
+    )
+
+    site_pos, site_ids = pd.factorize(stats["site_id"], sort=True)
+    year_pos, years = pd.factorize(stats["year"], sort=True)
+    week_pos, weeks = pd.factorize(stats["week_bin"], sort=True)
+
+    values = np.full(
+        (
+            len(site_ids),
+            len(years),
+            len(weeks),
+            len(PARTIAL_METRICS),
+            len(PARTIAL_STATS),
+        ),
+        np.nan,
+        dtype=np.float64,
+    )
+    values[..., PARTIAL_STATS.index("sum")] = 0.0
+    values[..., PARTIAL_STATS.index("count")] = 0.0
+
+    for m, metric in enumerate(PARTIAL_METRICS):
+        for s, stat in enumerate(PARTIAL_STATS):
+            values[site_pos, year_pos, week_pos, m, s] = stats[(metric, stat)]
+
+    axes = {
+        "site_id": list(site_ids),
+        "year": list(years),
+        "week_bin": list(weeks),
+        "metric": PARTIAL_METRICS,
+        "stat": list(PARTIAL_STATS),
+    }
+    write_array_store(PARTIALS_PATH, values, axes, signature)
+
+    return open_partials(rebuild=False)
+
+
+def open_partials(rebuild: bool = True) -> PartialStore:
+    """
+    Open the partial store, rebuilding it if missing or stale (any
+    metrics CSV or sites_fixed.csv changed) when `rebuild` is True.
+    """
+    stored = read_array_store(PARTIALS_PATH)
+
+    if stored is not None:
+        values, meta = stored
+        if meta.get("signature") == partials_signature():
+            return PartialStore(values, meta["axes"])
+
+    if not rebuild:
+        raise FileNotFoundError("No up-to-date partial store")
+
+    return build_partials()
+
+
+def patch_partials(rows: pd.DataFrame, signature: dict) -> bool:
+    """
+    Write metrics `rows` (one per site × year × week, as now on disk)
+    over their cells of the partial store and re-sign it, so an ingest
+    leaves it current without a rebuild from every metrics CSV.
+
+    `signature` is partials_signature() from before the CSVs changed.
+    A store that was already stale, or whose axes lack a row's site,
+    year or week, is rebuilt instead. Returns False if there is no
+    store to update (it is built on first use).
+    """
+    stored = read_array_store(PARTIALS_PATH)
+    if stored is None:
+        return False
+
+    old, meta = stored
+    axes = meta["axes"]
+
+    if meta.get("signature") != signature or axes["metric"] != PARTIAL_METRICS:
+        build_partials()
+        return True
+
+    pos = []
+    for name in ("site_id", "year", "week_bin"):
+        index = {label: i for i, label in enumerate(axes[name])}
+        try:
+            pos.append([index[v] for v in rows[name].tolist()])
+        except KeyError:
+            # New site or week: the array needs another row
+            build_partials()
+            return True
+
+    x = rows[PARTIAL_METRICS].to_numpy(dtype=np.float64)
+    has = ~np.isnan(x)
+
+    # A single row per cell: its stats are the values themselves
+    stats = {
+        "sum": np.where(has, x, 0.0),
+        "count": has.astype(np.float64),
+        "min": x,
+        "max": x,
+    }
+
+    values = np.array(old)
+    for s, stat in enumerate(axes["stat"]):
+        values[(*pos, slice(None), s)] = stats[stat]
+
+    write_array_store(PARTIALS_PATH, values, axes, partials_signature())
+    return True
+
+
+def available_years() -> list[int]:
+    """
+    Years with data in any metrics CSV.
+    """
+    return open_partials().years
+
+
+# -----------------------------
+# Year-window spatial tables
+# -----------------------------
+def load_year_window(
+    years,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Weekly spatial table for an arbitrary year set, shaped like
+    load_with_sites(kind="spatial", ...): site metadata merged, spatial
+    dtype schema applied, rows week-major.
+
+    The full table is built once per year set and partials version;
+    later column loads only project it.
+    """
+    key = (tuple(sorted(set(years))), json.dumps(partials_signature()))
+
+    with _YEAR_TABLES_LOCK:
+        df = _YEAR_TABLES.get(key)
+        if df is not None:
+            _YEAR_TABLES.move_to_end(key)
+
+    if df is None:
+        df = _build_year_table(key[0])
+
+        with _YEAR_TABLES_LOCK:
+            _YEAR_TABLES[key] = df
+            while len(_YEAR_TABLES) > YEAR_TABLE_CACHE_SIZE:
+                _YEAR_TABLES.popitem(last=False)
+
+    if columns is not None:
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"Year window missing columns: {missing}")
+        df = df[list(columns)]
+
+    return df
+
+
+def evict_year_tables() -> int:
+    """
+    Drop combined tables built from an older partials version; returns
+    the count.
+    """
+    current = json.dumps(partials_signature())
+
+    with _YEAR_TABLES_LOCK:
+        stale = [key for key in _YEAR_TABLES if key[1] != current]
+        for key in stale:
+            del _YEAR_TABLES[key]
+        return len(stale)
+
+
+def _build_year_table(years) -> pd.DataFrame:
+    df = add_ranks_and_decisions(open_partials().combine(years))
+
+    sites = load_sites()[
+        ["site_id", "site_name", "state", "latitude", "longitude"]
+    ]
+    df = df.merge(sites, on="site_id", how="left", validate="many_to_one")
+
+    if df["site_name"].isna().any():
+        raise ValueError(
+            "Some site_id values could not be mapped to sites_fixed.csv"
+        )
+
+    # Same row order as the built weekly_spatial_* files
+    df = df.sort_values(
+        ["week_bin", "suitability_rank", "site_name"],
+        ignore_index=True,
+    )
+    return apply_schema(df, "spatial")
+
+
+# Combined tables of recently used year sets (a few MB each)
+_YEAR_TABLES: OrderedDict[tuple, pd.DataFrame] = OrderedDict()
+_YEAR_TABLES_LOCK = threading.Lock()
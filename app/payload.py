@@ -0,0 +1,60 @@
+"""
+payload.py
+
+Compact array encodings for figure payloads.
+
+Responsible ONLY for:
+- Rounding values to the precision they are displayed with
+- Narrowing dtypes so Plotly can ship arrays as base64 typed arrays
+
+Plotly >= 6 serialises numpy arrays as typed arrays (base64), so a
+narrow dtype is what shrinks the payload. Older versions write JSON
+lists, where float32 would print as long decimals; there we keep
+float64 and rely on rounding alone.
+
+NO business logic
+NO Streamlit imports
+"""
+
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import plotly
+
+TYPED_ARRAYS = int(plotly.__version__.split(".")[0]) >= 6
+
+
+def format_decimals(value_format: str, default: int = 6) -> int:
+    """
+    Decimal places shown by a format spec (".2f" -> 2, "d" -> 0).
+    """
+    match = re.search(r"\.(\d+)", value_format)
+    if match:
+        return int(match.group(1))
+    if value_format.endswith("d"):
+        return 0
+    return default
+
+
+def compact_floats(values, decimals: int) -> np.ndarray:
+    """
+    Values rounded to `decimals`, as float32 where typed arrays are used.
+    NaN is preserved.
+    """
+    values = np.round(np.asarray(values, dtype=np.float64), decimals)
+    return values.astype(np.float32) if TYPED_ARRAYS else values
+
+
+def compact_ints(values) -> np.ndarray:
+    """
+    Integer values in the narrowest dtype that holds them.
+    """
+    values = np.asarray(values)
+    if values.size == 0:
+        return values.astype(np.int32)
+
+    lo, hi = int(values.min()), int(values.max())
+    dtype = np.result_type(np.min_scalar_type(lo), np.min_scalar_type(hi))
+    return values.astype(dtype)
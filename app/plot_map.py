@@ -8,17 +8,27 @@ Uses Plotly Scattergeo (NO Mapbox dependency).
 
 from __future__ import annotations
 
+import numpy as np
 import plotly.graph_objects as go
 
-from app.transforms import classify_suitability
-from app.config import VARIABLES, STATE_NAME_LOOKUP
+from app.payload import compact_floats, compact_ints
+from app.profiling import profiled
+from app.transforms import (
+    classify_suitability_array,
+    filter_weeks,
+    week_partitions,
+)
+from app.config import VARIABLES, STATE_NAME_LOOKUP, SUITABILITY_CLASSES
 
 
+@profiled()
 def plot_suitability_map(
     df,
     variable_key: str,
     week: int,
     height: int = 650,
+    partitions=None,
+    compact: bool = False,
 ):
     """
     Plot suitability map for a single week.
@@ -30,92 +40,270 @@ def plot_suitability_map(
       - lat
       - long
       - value column
+
+    Pass the dataset's week partitions to slice the week out instead of
+    scanning every row. `compact` sends coordinates, sizes and class
+    colours as narrow typed arrays (see _map_trace).
     """
 
     var_cfg = VARIABLES[variable_key]
-    value_col = var_cfg["column"]
-    unit = var_cfg.get("unit")
 
     # -----------------------------
     # Filter week
     # -----------------------------
-    data = df[df["week_bin"] == week].copy()
+    data = filter_weeks(df, [week], partitions=partitions)
     if data.empty:
         return go.Figure()
 
     # -----------------------------
-    # Classify suitability
+    # Classify suitability (whole column at once)
     # -----------------------------
-    records = []
-    for _, row in data.iterrows():
-        value = row.get(value_col)
-        cls = classify_suitability(value)
-
-        if cls is None:
-            continue
-
-        state_code = row.get("state")
-        state_name = STATE_NAME_LOOKUP.get(state_code, state_code)
-
-        records.append(
-            {
-                "site": row["site_name"],
-                "state": state_name,
-                "lat": float(row["latitude"]),
-                "lon": float(row["longitude"]),
-                "value": float(value),
-                "label": cls["label"],
-                "color": cls["color"],
-                "size": cls["size"],
-            }
-        )
-
-    if not records:
+    markers = _map_markers(data, var_cfg["column"])
+    if not markers["keep"].any():
         return go.Figure()
 
-    # -----------------------------
-    # Hover text
-    # -----------------------------
-    value_line = f"{var_cfg['label']}: %{{customdata[2]:.2f}}"
-    if unit:
-        value_line += f" {unit}"
-
-    hovertemplate = (
-        "<b>%{customdata[0]}</b><br>"
-        "State: %{customdata[1]}<br>"
-        + value_line
-        + "<br>"
-        "Class: %{customdata[3]}"
-        "<extra></extra>"
-    )
-
     # -----------------------------
     # Build figure
     # -----------------------------
     fig = go.Figure()
 
     fig.add_trace(
-        go.Scattergeo(
-            lat=[r["lat"] for r in records],
-            lon=[r["lon"] for r in records],
+        _map_trace(markers, _map_hovertemplate(var_cfg), compact=compact)
+    )
+
+    _apply_map_layout(fig, f"{var_cfg['label']} — Week {week}", height)
+
+    return fig
+
+
+@profiled()
+def plot_suitability_map_animated(
+    df,
+    variable_key: str,
+    height: int = 650,
+    partitions=None,
+    compact: bool = False,
+):
+    """
+    Plot suitability maps for every week as animation frames.
+
+    All weeks' markers are built once; the week slider and play button
+    run in the browser, so scrubbing costs no server round trip.
+    `compact` as for plot_suitability_map.
+    """
+    var_cfg = VARIABLES[variable_key]
+
+    if partitions is None:
+        order = np.argsort(df["week_bin"].to_numpy(), kind="stable")
+        df = df.iloc[order]
+        partitions = week_partitions(df["week_bin"])
+
+    if partitions is None or len(partitions.weeks) == 0:
+        return go.Figure()
+
+    # Classify every row once, then cut per week
+    markers = _map_markers(df, var_cfg["column"])
+    hovertemplate = _map_hovertemplate(var_cfg)
+
+    frames = []
+    for i, week in enumerate(partitions.weeks):
+        rows = slice(partitions.offsets[i], partitions.offsets[i + 1])
+        frames.append(
+            go.Frame(
+                name=str(week),
+                data=[_map_trace(markers, hovertemplate, rows, compact)],
+                layout=dict(title_text=f"{var_cfg['label']} — Week {week}"),
+            )
+        )
+
+    fig = go.Figure(data=frames[0].data, frames=frames)
+
+    _apply_map_layout(
+        fig,
+        f"{var_cfg['label']} — Week {partitions.weeks[0]}",
+        height,
+    )
+
+    frame_args = dict(
+        mode="immediate",
+        frame=dict(duration=0, redraw=True),
+        transition=dict(duration=0),
+    )
+
+    fig.update_layout(
+        margin=dict(l=0, r=0, t=40, b=60),
+        sliders=[
+            dict(
+                active=0,
+                currentvalue=dict(prefix="Week: "),
+                pad=dict(t=10),
+                steps=[
+                    dict(
+                        label=frame.name,
+                        method="animate",
+                        args=[[frame.name], frame_args],
+                    )
+                    for frame in frames
+                ],
+            )
+        ],
+        updatemenus=[
+            dict(
+                type="buttons",
+                direction="left",
+                x=0,
+                y=0,
+                xanchor="right",
+                yanchor="top",
+                pad=dict(t=10, r=10),
+                buttons=[
+                    dict(
+                        label="▶",
+                        method="animate",
+                        args=[
+                            None,
+                            dict(
+                                frame_args,
+                                frame=dict(duration=400, redraw=True),
+                            ),
+                        ],
+                    ),
+                    dict(
+                        label="❚❚",
+                        method="animate",
+                        args=[[None], frame_args],
+                    ),
+                ],
+            )
+        ],
+    )
+
+    return fig
+
+
+# -----------------------------
+# Shared helpers
+# -----------------------------
+@profiled()
+def _map_markers(data, value_col: str) -> dict:
+    """
+    Marker arrays for every row of `data`; `keep` flags plotted rows.
+    """
+    values = data[value_col].to_numpy(dtype=float)
+    class_index, colors, sizes = classify_suitability_array(values)
+
+    class_labels = np.array(
+        [cls["label"] for cls in SUITABILITY_CLASSES] + [""], dtype=object
+    )
+
+    state_codes, state_pos = np.unique(
+        np.asarray(data["state"], dtype=object), return_inverse=True
+    )
+    state_names = np.array(
+        [STATE_NAME_LOOKUP.get(code, code) for code in state_codes],
+        dtype=object,
+    )[state_pos]
+
+    return {
+        "keep": class_index >= 0,
+        "class_index": class_index,
+        "lat": data["latitude"].to_numpy(dtype=float),
+        "lon": data["longitude"].to_numpy(dtype=float),
+        "size": sizes,
+        "color": colors,
+        "customdata": np.column_stack(
+            [
+                np.asarray(data["site_name"], dtype=object),
+                state_names,
+                values.astype(object),
+                class_labels[class_index],
+            ]
+        ),
+    }
+
+
+def _map_trace(
+    markers: dict,
+    hovertemplate: str,
+    rows=slice(None),
+    compact: bool = False,
+):
+    keep = markers["keep"][rows]
+
+    def pick(name):
+        return markers[name][rows][keep]
+
+    if not compact:
+        return go.Scattergeo(
+            lat=pick("lat"),
+            lon=pick("lon"),
             mode="markers",
             marker=dict(
-                size=[r["size"] for r in records],
-                color=[r["color"] for r in records],
+                size=pick("size"),
+                color=pick("color"),
                 opacity=0.85,
                 line=dict(width=0.5, color="white"),
             ),
-            customdata=[
-                [r["site"], r["state"], r["value"], r["label"]]
-                for r in records
-            ],
+            customdata=pick("customdata"),
             hovertemplate=hovertemplate,
         )
+
+    # Compact: ~1 m coordinates, integer sizes, and the class index
+    # mapped through a stepped colour scale instead of colour strings.
+    customdata = pick("customdata").copy()
+    customdata[:, 2] = np.round(customdata[:, 2].astype(float), 2)
+
+    return go.Scattergeo(
+        lat=compact_floats(pick("lat"), 5),
+        lon=compact_floats(pick("lon"), 5),
+        mode="markers",
+        marker=dict(
+            size=compact_ints(pick("size")),
+            color=compact_ints(pick("class_index")),
+            colorscale=_CLASS_COLORSCALE,
+            cmin=-0.5,
+            cmax=len(SUITABILITY_CLASSES) - 0.5,
+            showscale=False,
+            opacity=0.85,
+            line=dict(width=0.5, color="white"),
+        ),
+        customdata=customdata,
+        hovertemplate=hovertemplate,
     )
 
-    # -----------------------------
-    # Layout
-    # -----------------------------
+
+def _class_colorscale() -> list:
+    """
+    Stepped colour scale: class index k -> that class's colour.
+    """
+    n = len(SUITABILITY_CLASSES)
+    scale = []
+    for k, cls in enumerate(SUITABILITY_CLASSES):
+        scale += [[k / n, cls["color"]], [(k + 1) / n, cls["color"]]]
+    return scale
+
+
+_CLASS_COLORSCALE = _class_colorscale()
+
+
+def _map_hovertemplate(var_cfg: dict) -> str:
+    unit = var_cfg.get("unit")
+
+    value_line = f"{var_cfg['label']}: %{{customdata[2]:.2f}}"
+    if unit:
+        value_line += f" {unit}"
+
+    return (
+        "<b>%{customdata[0]}</b><br>"
+        "State: %{customdata[1]}<br>"
+        + value_line
+        + "<br>"
+        "Class: %{customdata[3]}"
+        "<extra></extra>"
+    )
+
+
+def _apply_map_layout(fig, title: str, height: int) -> None:
     fig.update_layout(
         geo=dict(
             scope="usa",
@@ -128,11 +316,9 @@ def plot_suitability_map(
         margin=dict(l=0, r=0, t=40, b=0),
         height=height,
         title=dict(
-            text=f"{var_cfg['label']} — Week {week}",
+            text=title,
             x=0.5,
             xanchor="center",
         ),
         showlegend=False,
     )
-
-    return fig
@@ -1,11 +1,22 @@
 import numpy as np
+import plotly.colors as pc
 import plotly.graph_objects as go
 import streamlit as st
 
+from app.cube import winner_mask
+from app.payload import compact_floats, compact_ints, format_decimals
+from app.profiling import profiled
 from app.transforms import build_site_week_matrix
 from app.config import VARIABLES, get_colorscale, STATE_NAME_LOOKUP
 
 
+FOCUS_MASK_COLOR = "rgba(120,120,120,0.75)"
+
+# Overlays defined for state roll-up rows (no ranks or winners)
+STATE_OVERLAYS = ("none", "value")
+
+
+@profiled()
 def plot_heatmap(
     df,
     variable_key: str,
@@ -15,7 +26,22 @@ def plot_heatmap(
     show_colorbar: bool = True,
     dataset_label: str | None = None,
     site_order: list[str] | None = None,
+    cube=None,
+    overlay_options: list[str] | None = None,
+    compact: bool = False,
 ):
+    """
+    Site × week heatmap with an optional overlay.
+
+    Pass `overlay_options` to embed every listed overlay plus both
+    colour scales in the figure, switched by in-chart buttons with no
+    server rerun. `overlay_key` and the colourblind setting are then
+    only the initial state.
+
+    `compact` shrinks the payload: values are rounded to their display
+    precision and sent as narrow typed arrays, and each site's state
+    rides on its row label instead of being repeated in every cell.
+    """
     var_cfg = VARIABLES[variable_key]
 
     value_col = var_cfg["column"]
@@ -25,7 +51,7 @@ def plot_heatmap(
     # -----------------------------
     # BUILD SITE × WEEK MATRIX
     # -----------------------------
-    matrix = build_site_week_matrix(df, value_col)
+    matrix = build_site_week_matrix(df, value_col, cube=cube)
 
     # -----------------------------
     # APPLY SITE ORDER (FROM main.py)
@@ -53,11 +79,23 @@ def plot_heatmap(
         for s in sites
     }
 
-    # customdata needs same shape as z
-    customdata = [
-        [site_state_name.get(site) for _ in weeks]
-        for site in sites
-    ]
+    if compact:
+        # State once per row (hover shows the category) not once per cell
+        y_labels = [f"{s}<br>State: {site_state_name.get(s)}" for s in sites]
+        customdata = None
+    else:
+        y_labels = sites
+        # customdata needs same shape as z
+        customdata = [
+            [site_state_name.get(site) for _ in weeks]
+            for site in sites
+        ]
+
+    # -----------------------------
+    # ACTIVE ROWS / COLUMNS
+    # -----------------------------
+    site_active = np.array([s in active_sites for s in sites], dtype=bool)
+    week_active = np.array([w in active_weeks for w in weeks], dtype=bool)
 
     # -----------------------------
     # FIGURE SETUP
@@ -70,18 +108,14 @@ def plot_heatmap(
     # -----------------------------
     colourblind = st.session_state.get("colourblind", False)
     colorscale = get_colorscale(variable_key, colourblind)
-    overlay_text_color = "white" if colourblind else "black"
+    overlay_text_color = _overlay_text_color(colourblind)
 
     # -----------------------------
     # COLOR RANGE
     # -----------------------------
     vmin = var_cfg.get("vmin")
     vmax = var_cfg.get("vmax")
-    zmid = (
-        (vmin + vmax) / 2
-        if (not colourblind and vmin is not None and vmax is not None)
-        else None
-    )
+    zmid = _zmid(var_cfg, colourblind)
 
     # -----------------------------
     # HOVER TEMPLATE
@@ -94,8 +128,8 @@ def plot_heatmap(
 
     hovertemplate = (
         "Site: %{y}<br>"
-        "State: %{customdata}<br>"
-        "Week: %{x}<br>"
+        + ("" if compact else "State: %{customdata}<br>")
+        + "Week: %{x}<br>"
         f"{var_cfg['label']}: {hover_value}"
         "<extra></extra>"
     )
@@ -105,9 +139,9 @@ def plot_heatmap(
     # -----------------------------
     fig.add_trace(
         go.Heatmap(
-            z=z,
-            x=weeks,
-            y=sites,
+            z=compact_floats(z, format_decimals(value_format)) if compact else z,
+            x=compact_ints(weeks) if compact else weeks,
+            y=y_labels,
             customdata=customdata,
             colorscale=colorscale,
             zmin=vmin,
@@ -128,169 +162,560 @@ def plot_heatmap(
     )
 
     # -----------------------------
-    # VALUE OVERLAY
+    # OVERLAY LAYERS
     # -----------------------------
-    if overlay_key == "value":
+    # Server-rendered: only the chosen overlay. In-chart switching: all.
+    wanted = overlay_options if overlay_options is not None else [overlay_key]
+
+    rank_col = var_cfg.get("rank_column")
+    has_rank = bool(rank_col) and rank_col in df.columns
+
+    # overlay -> (cell text, font size) on the heatmap trace
+    text_layers = {}
+
+    if "value" in wanted:
+        text_layers["value"] = (_value_text(z, value_format).tolist(), 10)
+
+    # RANK OVERLAY (HIDE WORST ZEROES)
+    if "rank" in wanted and has_rank:
+        rank_matrix = build_site_week_matrix(
+            df, rank_col, cube=cube
+        ).loc[sites]
+
+        text_layers["rank"] = (
+            _rank_text(rank_matrix.to_numpy(dtype=float), z).tolist(),
+            11,
+        )
+
+    if overlay_key in text_layers:
+        text, size = text_layers[overlay_key]
         fig.update_traces(
-            text=[
-                [
-                    "" if np.isnan(matrix.loc[s, w])
-                    else format(matrix.loc[s, w], value_format)
-                    for w in weeks
-                ]
-                for s in sites
-            ],
+            text=text,
             texttemplate="%{text}",
-            textfont=dict(color=overlay_text_color, size=10),
+            textfont=dict(color=overlay_text_color, size=size),
         )
+    elif overlay_options is not None:
+        # Text may be switched on in the browser later
+        fig.update_traces(textfont=dict(color=overlay_text_color))
 
     # -----------------------------
-    # RANK OVERLAY (HIDE WORST ZEROES)
+    # WINNER OVERLAY (SKIP ZERO-WEEKS)
     # -----------------------------
-    if overlay_key == "rank":
-        rank_col = var_cfg.get("rank_column")
-        if rank_col and rank_col in df.columns:
+    winner_trace = None
+
+    if "winner" in wanted and has_rank:
+        if cube is not None and cube.has(value_col) and cube.has(rank_col):
+            # Precomputed once per dataset × variable
+            rows = [cube.site_index[s] for s in sites]
+            winners = cube.winners(value_col, rank_col)[rows]
+        else:
             rank_matrix = build_site_week_matrix(df, rank_col).loc[sites]
-            worst_rank_per_week = rank_matrix.max(axis=0)
-
-            fig.update_traces(
-                text=[
-                    [
-                        ""
-                        if (
-                            np.isnan(rank_matrix.loc[s, w])
-                            or (
-                                rank_matrix.loc[s, w] == worst_rank_per_week[w]
-                                and (
-                                    np.isnan(matrix.loc[s, w])
-                                    or matrix.loc[s, w] <= 0
-                                )
-                            )
-                        )
-                        else str(int(rank_matrix.loc[s, w]))
-                        for w in weeks
-                    ]
-                    for s in sites
-                ],
-                texttemplate="%{text}",
-                textfont=dict(color=overlay_text_color, size=11),
+            winners = winner_mask(rank_matrix.to_numpy(dtype=float), z)
+
+        winners = winners & site_active[:, None] & week_active[None, :]
+
+        # Markers listed week by week, top to bottom
+        win_w, win_s = np.nonzero(winners.T)
+
+        win_x = [weeks[j] for j in win_w]
+        win_y = [sites[i] for i in win_s]
+        hover_text = _winner_hover_text(
+            sites=np.array(win_y, dtype=object),
+            states=np.array(
+                [site_state_name.get(s) for s in win_y], dtype=object
+            ),
+            weeks=np.array(win_x, dtype=object),
+            values=z[win_s, win_w],
+            label=var_cfg["label"],
+            value_format=value_format,
+            unit=unit,
+        ).tolist()
+
+        if win_x:
+            winner_trace = go.Scatter(
+                x=win_x,
+                y=[y_labels[i] for i in win_s],
+                mode="markers",
+                marker=dict(
+                    size=16,
+                    color="black",
+                    line=dict(color="white", width=2),
+                ),
+                text=hover_text,
+                hovertemplate="%{text}<extra></extra>",
+                showlegend=False,
             )
 
-    # -----------------------------
-    # WINNER OVERLAY (SKIP ZERO-WEEKS)
-    # -----------------------------
-    if overlay_key == "winner":
-        rank_col = var_cfg.get("rank_column")
-        if rank_col and rank_col in df.columns:
-            rank_matrix = build_site_week_matrix(df, rank_col).loc[sites]
-            week_max = matrix.max(axis=0)
-
-            win_x, win_y, hover_text = [], [], []
-
-            for w in weeks:
-                if np.isnan(week_max[w]) or week_max[w] <= 0:
-                    continue
-
-                for s in sites:
-                    if (
-                        rank_matrix.loc[s, w] == 1
-                        and s in active_sites
-                        and w in active_weeks
-                    ):
-                        win_x.append(w)
-                        win_y.append(s)
-
-                        val = matrix.loc[s, w]
-                        val_str = (
-                            format(val, value_format)
-                            + (f" {unit}" if unit else "")
-                            if not np.isnan(val)
-                            else "N/A"
-                        )
-
-                        hover_text.append(
-                            f"Site: {s}<br>"
-                            f"State: {site_state_name.get(s)}<br>"
-                            f"Week: {w}<br>"
-                            f"{var_cfg['label']}: {val_str}<br>"
-                            "Rank: 1"
-                        )
-
-            if win_x:
-                fig.add_trace(
-                    go.Scatter(
-                        x=win_x,
-                        y=win_y,
-                        mode="markers",
-                        marker=dict(
-                            size=16,
-                            color="black",
-                            line=dict(color="white", width=2),
-                        ),
-                        text=hover_text,
-                        hovertemplate="%{text}<extra></extra>",
-                        showlegend=False,
-                    )
-                )
+            if overlay_options is not None:
+                winner_trace.visible = overlay_key == "winner"
+
+            fig.add_trace(winner_trace)
 
     # -----------------------------
     # FOCUS MASK (INACTIVE WEEKS / SITES)
     # -----------------------------
-    shapes = [
-        dict(
-            type="rect",
-            x0=w - 0.5,
-            x1=w + 0.5,
-            y0=i - 0.5,
-            y1=i + 0.5,
-            fillcolor="rgba(120,120,120,0.75)",
-            line=dict(width=0),
-            layer="above",
+    # One flat-coloured heatmap layer over every inactive cell (NaN cells
+    # are transparent), so payload size doesn't grow with the mask.
+    inactive = ~(site_active[:, None] & week_active[None, :])
+
+    if inactive.any():
+        mask = np.where(inactive, 1.0, np.nan)
+
+        fig.add_trace(
+            go.Heatmap(
+                z=compact_floats(mask, 0) if compact else mask,
+                x=compact_ints(weeks) if compact else weeks,
+                y=y_labels,
+                colorscale=[[0, FOCUS_MASK_COLOR], [1, FOCUS_MASK_COLOR]],
+                zmin=0,
+                zmax=1,
+                showscale=False,
+                hoverinfo="skip",
+            )
         )
-        for i, s in enumerate(sites)
-        for w in weeks
-        if s not in active_sites or w not in active_weeks
-    ]
 
     # -----------------------------
     # TITLE + LAYOUT
     # -----------------------------
-    subtitle = var_cfg.get("description", "")
+    fig.update_layout(
+        showlegend=False,
+        height=fig_height,
+        autosize=False,
+        margin=dict(l=160, r=60, t=90, b=40),
+        title=_heatmap_title(var_cfg, dataset_label),
+        xaxis=dict(showgrid=False, zeroline=False),
+        yaxis=dict(
+            type="category",
+            categoryorder="array",
+            categoryarray=y_labels,
+            autorange="reversed",
+            showgrid=False,
+            zeroline=False,
+        ),
+    )
 
-    if var_cfg.get("time_window"):
-        subtitle += f" (data from {var_cfg['time_window']})"
+    if compact:
+        # Row categories carry the state; ticks show the site alone
+        fig.update_yaxes(tickmode="array", tickvals=y_labels, ticktext=sites)
 
-    if unit:
-        subtitle += f" [{unit}]"
+    # -----------------------------
+    # IN-CHART TOGGLES
+    # -----------------------------
+    if overlay_options is not None:
+        fig.update_layout(
+            updatemenus=[
+                _overlay_menu(
+                    overlay_options,
+                    overlay_key,
+                    text_layers,
+                    winner_trace,
+                    winner_index=1 if winner_trace is not None else None,
+                ),
+                _palette_menu(variable_key, var_cfg, colourblind),
+            ],
+        )
 
-    if dataset_label:
-        subtitle += f" — {dataset_label}"
+    return fig
+
+
+@profiled()
+def plot_state_heatmap(
+    cube,
+    variable_key: str,
+    overlay_key: str,
+    active_weeks: set,
+    site_order: list[str],
+    expanded_states=(),
+    show_colorbar: bool = True,
+    dataset_label: str | None = None,
+    overlay_options: list[str] | None = None,
+    compact: bool = False,
+):
+    """
+    Level-of-detail heatmap: one row per state (weekly mean over its
+    sites in `site_order`), with the sites of `expanded_states` listed
+    beneath their state row.
+
+    Rows scale with states rather than sites, so this stays usable and
+    cheap to ship for large portfolios. States appear in order of their
+    first site in `site_order`. Only the STATE_OVERLAYS apply; ranks
+    and winners are not defined for roll-ups, so other overlays (in
+    `overlay_key` or `overlay_options`) draw no text.
+
+    `overlay_options` embeds in-chart overlay and palette buttons, as
+    in plot_heatmap.
+    """
+    var_cfg = VARIABLES[variable_key]
+
+    if overlay_options is not None:
+        overlay_options = [o for o in overlay_options if o in STATE_OVERLAYS]
+        if overlay_key not in overlay_options:
+            overlay_key = overlay_options[0]
+
+    value_col = var_cfg["column"]
+    unit = var_cfg.get("unit")
+    value_format = var_cfg.get("value_format", ".2f")
+
+    # -----------------------------
+    # ROWS: STATE ROLL-UPS + EXPANDED SITES
+    # -----------------------------
+    states, state_z, n_sites = cube.state_rollup(value_col, sites=site_order)
+    state_row = {state: i for i, state in enumerate(states)}
+
+    site_state = dict(zip(cube.site_names, cube.site_states))
+    sites_by_state = {}
+    for site in site_order:
+        sites_by_state.setdefault(site_state[site], []).append(site)
+
+    plane = cube.plane(value_col)
+    expanded_states = set(expanded_states)
+
+    labels, z_rows = [], []
+    for state, sites in sites_by_state.items():
+        name = STATE_NAME_LOOKUP.get(state, state)
+        marker = "▾" if state in expanded_states else "▸"
+        count = n_sites[state_row[state]]
+
+        labels.append(f"<b>{marker} {name} ({count} sites)</b>")
+        z_rows.append(state_z[state_row[state]])
+
+        if state in expanded_states:
+            labels.extend(sites)
+            z_rows.extend(plane[[cube.site_index[s] for s in sites]])
+
+    weeks = list(cube.weeks)
+    z = np.array(z_rows, dtype=float).reshape(len(labels), len(weeks))
+
+    week_active = np.array([w in active_weeks for w in weeks], dtype=bool)
+
+    # -----------------------------
+    # COLOURS
+    # -----------------------------
+    colourblind = st.session_state.get("colourblind", False)
+
+    hover_value = (
+        f"%{{z:{value_format}}} {unit}"
+        if unit
+        else f"%{{z:{value_format}}}"
+    )
+
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Heatmap(
+            z=compact_floats(z, format_decimals(value_format)) if compact else z,
+            x=compact_ints(weeks) if compact else weeks,
+            y=labels,
+            colorscale=get_colorscale(variable_key, colourblind),
+            zmin=var_cfg.get("vmin"),
+            zmax=var_cfg.get("vmax"),
+            zmid=_zmid(var_cfg, colourblind),
+            connectgaps=False,
+            hovertemplate=(
+                "%{y}<br>"
+                "Week: %{x}<br>"
+                f"{var_cfg['label']}: {hover_value}"
+                "<extra></extra>"
+            ),
+            colorbar=dict(
+                title=(
+                    f"{var_cfg['label']} ({unit})"
+                    if unit
+                    else var_cfg["label"]
+                ),
+                thickness=16,
+                len=0.9,
+            ) if show_colorbar else None,
+        )
+    )
+
+    # overlay -> (cell text, font size), as in plot_heatmap
+    text_layers = {}
+    if "value" in (overlay_options or [overlay_key]):
+        text_layers["value"] = (_value_text(z, value_format).tolist(), 10)
+
+    if overlay_key in text_layers:
+        text, size = text_layers[overlay_key]
+        fig.update_traces(
+            text=text,
+            texttemplate="%{text}",
+            textfont=dict(color=_overlay_text_color(colourblind), size=size),
+        )
+    elif overlay_options is not None:
+        # Text may be switched on in the browser later
+        fig.update_traces(
+            textfont=dict(color=_overlay_text_color(colourblind))
+        )
+
+    # -----------------------------
+    # FOCUS MASK (INACTIVE WEEKS)
+    # -----------------------------
+    if not week_active.all():
+        mask = np.where(week_active[None, :], np.nan, 1.0).repeat(
+            len(labels), axis=0
+        )
+
+        fig.add_trace(
+            go.Heatmap(
+                z=compact_floats(mask, 0) if compact else mask,
+                x=compact_ints(weeks) if compact else weeks,
+                y=labels,
+                colorscale=[[0, FOCUS_MASK_COLOR], [1, FOCUS_MASK_COLOR]],
+                zmin=0,
+                zmax=1,
+                showscale=False,
+                hoverinfo="skip",
+            )
+        )
 
     fig.update_layout(
         showlegend=False,
-        height=fig_height,
+        height=max(400, len(labels) * 22),
         autosize=False,
-        margin=dict(l=160, r=60, t=90, b=40),
-        title=dict(
-            text=(
-                f"{var_cfg['label']}<br>"
-                f"<span style='font-size:14px; color:#666;'>"
-                f"{subtitle}"
-                f"</span>"
-            ),
-            x=0.5,
-            xanchor="center",
+        margin=dict(l=220, r=60, t=90, b=40),
+        title=_heatmap_title(
+            var_cfg,
+            dataset_label,
+            note="state rows show the mean over their sites",
         ),
         xaxis=dict(showgrid=False, zeroline=False),
         yaxis=dict(
             type="category",
             categoryorder="array",
-            categoryarray=sites,
+            categoryarray=labels,
             autorange="reversed",
             showgrid=False,
             zeroline=False,
         ),
-        shapes=shapes,
     )
 
+    # -----------------------------
+    # IN-CHART TOGGLES
+    # -----------------------------
+    if overlay_options is not None:
+        fig.update_layout(
+            updatemenus=[
+                _overlay_menu(
+                    overlay_options,
+                    overlay_key,
+                    text_layers,
+                    winner_trace=None,
+                    winner_index=None,
+                ),
+                _palette_menu(variable_key, var_cfg, colourblind),
+            ],
+        )
+
     return fig
+
+
+def _heatmap_title(
+    var_cfg: dict,
+    dataset_label: str | None,
+    note: str | None = None,
+) -> dict:
+    unit = var_cfg.get("unit")
+    subtitle = var_cfg.get("description", "")
+
+    if var_cfg.get("time_window"):
+        subtitle += f" (data from {var_cfg['time_window']})"
+
+    if unit:
+        subtitle += f" [{unit}]"
+
+    if dataset_label:
+        subtitle += f" — {dataset_label}"
+
+    if note:
+        subtitle += f"; {note}"
+
+    return dict(
+        text=(
+            f"{var_cfg['label']}<br>"
+            f"<span style='font-size:14px; color:#666;'>"
+            f"{subtitle}"
+            f"</span>"
+        ),
+        x=0.5,
+        xanchor="center",
+    )
+
+
+# -----------------------------
+# COLOUR STATE
+# -----------------------------
+def _overlay_text_color(colourblind: bool) -> str:
+    return "white" if colourblind else "black"
+
+
+def _zmid(var_cfg: dict, colourblind: bool):
+    vmin = var_cfg.get("vmin")
+    vmax = var_cfg.get("vmax")
+
+    if colourblind or vmin is None or vmax is None:
+        return None
+    return (vmin + vmax) / 2
+
+
+# -----------------------------
+# IN-CHART MENUS (CLIENT-SIDE RESTYLE)
+# -----------------------------
+def _overlay_menu(
+    overlay_options: list[str],
+    overlay_key: str,
+    text_layers: dict,
+    winner_trace,
+    winner_index: int | None,
+) -> dict:
+    """
+    Buttons that swap the heatmap's cell text and show/hide the winner
+    markers. Overlays with nothing to draw fall back to no text.
+    """
+    buttons = []
+
+    for option in overlay_options:
+        text, size = text_layers.get(option, (None, None))
+
+        style = {
+            "text": [text],
+            "texttemplate": ["%{text}" if text is not None else None],
+            "textfont.size": [size],
+        }
+        traces = [0]
+
+        if winner_index is not None:
+            # Restyle takes one value per listed trace
+            style = {k: v + [None] for k, v in style.items()}
+            style["text"][-1] = winner_trace.text
+            style["visible"] = [True, option == "winner"]
+            traces.append(winner_index)
+
+        buttons.append(
+            dict(
+                label=option.capitalize(),
+                method="restyle",
+                args=[style, traces],
+            )
+        )
+
+    return dict(
+        type="buttons",
+        direction="right",
+        active=overlay_options.index(overlay_key),
+        buttons=buttons,
+        x=0,
+        xanchor="left",
+        y=1,
+        yanchor="bottom",
+        pad=dict(b=6),
+        showactive=True,
+    )
+
+
+def _palette_menu(variable_key: str, var_cfg: dict, colourblind: bool) -> dict:
+    """
+    Buttons that swap the heatmap between the standard and the
+    colourblind-friendly colour scale.
+    """
+    buttons = []
+
+    for label, mode in (("Standard", False), ("Colourblind", True)):
+        # Restyle args skip figure validation: spell the scale out
+        colorscale = get_colorscale(variable_key, mode)
+        if not isinstance(colorscale, str):
+            colorscale = pc.make_colorscale(colorscale)
+
+        buttons.append(
+            dict(
+                label=label,
+                method="restyle",
+                args=[
+                    {
+                        "colorscale": [colorscale],
+                        "zmid": [_zmid(var_cfg, mode)],
+                        "textfont.color": [_overlay_text_color(mode)],
+                    },
+                    [0],
+                ],
+            )
+        )
+
+    return dict(
+        type="buttons",
+        direction="right",
+        active=int(colourblind),
+        buttons=buttons,
+        x=1,
+        xanchor="right",
+        y=1,
+        yanchor="bottom",
+        pad=dict(b=6),
+        showactive=True,
+    )
+
+
+# -----------------------------
+# OVERLAY TEXT (WHOLE-ARRAY)
+# -----------------------------
+@profiled()
+def _value_text(z: np.ndarray, value_format: str) -> np.ndarray:
+    """
+    Formatted cell values; "" for NaN cells.
+    """
+    text = np.full(z.shape, "", dtype=object)
+    valid = ~np.isnan(z)
+
+    try:
+        # printf-style formatting matches format() for plain specs
+        text[valid] = np.char.mod(f"%{value_format}", z[valid])
+    except (TypeError, ValueError):
+        text[valid] = [format(v, value_format) for v in z[valid]]
+
+    return text
+
+
+@profiled()
+def _rank_text(rank: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """
+    Integer ranks; "" for missing ranks and for the worst rank of a
+    week where the cell value is missing or <= 0 (hide worst zeroes).
+    """
+    worst_rank_per_week = np.fmax.reduce(rank, axis=0, initial=np.nan)
+
+    with np.errstate(invalid="ignore"):
+        hidden = np.isnan(rank) | (
+            (rank == worst_rank_per_week)
+            & (np.isnan(z) | (z <= 0))
+        )
+
+    text = np.full(rank.shape, "", dtype=object)
+    text[~hidden] = np.char.mod("%d", rank[~hidden])
+
+    return text
+
+
+@profiled()
+def _winner_hover_text(
+    sites: np.ndarray,
+    states: np.ndarray,
+    weeks: np.ndarray,
+    values: np.ndarray,
+    label: str,
+    value_format: str,
+    unit: str | None,
+) -> np.ndarray:
+    """
+    Hover labels for winner markers, built element-wise in bulk.
+    """
+    value_text = _value_text(values, value_format)
+    if unit:
+        value_text = value_text + f" {unit}"
+    value_text[np.isnan(values)] = "N/A"
+
+    return (
+        "Site: " + sites.astype(str).astype(object)
+        + "<br>State: " + states.astype(str).astype(object)
+        + "<br>Week: " + weeks.astype(str).astype(object)
+        + f"<br>{label}: " + value_text
+        + "<br>Rank: 1"
+    )
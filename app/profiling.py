@@ -0,0 +1,182 @@
+"""
+profiling.py
+
+Lightweight per-run timing spans.
+
+Responsible ONLY for:
+- Timing named stages (wall time, row counts, optional allocations)
+- Collecting the spans of the current run (one run per script thread)
+- Emitting one structured JSON log line per run
+
+Outside a run a span costs one ContextVar lookup, so instrumentation
+can stay in place in production. Allocation tracking uses tracemalloc
+and is opt-in: it slows everything it measures.
+
+NO business logic
+NO Streamlit / Plotly imports
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class RunProfile:
+    """
+    Spans recorded during one run, in start order with nesting depth.
+    """
+
+    def __init__(self, name: str, allocations: bool = False):
+        self.name = name
+        self.allocations = allocations
+        self.spans: list[dict] = []
+
+        self._depth = 0
+        self._started = time.perf_counter()
+        self._owns_tracemalloc = False
+
+        if allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self) -> dict:
+        return {
+            "event": "run_profile",
+            "run": self.name,
+            "total_ms": round(self.elapsed_ms, 2),
+            "spans": self.spans,
+        }
+
+    def finish(self, log: bool = True) -> dict:
+        """
+        Stop collecting; logs and returns the run summary.
+        """
+        if _CURRENT.get() is self:
+            _CURRENT.set(None)
+
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+        summary = self.to_dict()
+        if log:
+            logger.info(json.dumps(summary))
+        return summary
+
+
+_CURRENT: ContextVar[RunProfile | None] = ContextVar(
+    "run_profile", default=None
+)
+
+
+def start_run(name: str = "rerun", allocations: bool = False) -> RunProfile:
+    """
+    Begin collecting spans in the current thread; replaces any run
+    left unfinished by an interrupted script.
+    """
+    profile = RunProfile(name, allocations=allocations)
+    _CURRENT.set(profile)
+    return profile
+
+
+def current_run() -> RunProfile | None:
+    return _CURRENT.get()
+
+
+@contextmanager
+def span(name: str, rows: int | None = None) -> Iterator[dict]:
+    """
+    Time a stage of the current run.
+
+    Yields the span record; set record["rows"] inside the block to
+    report how many rows the stage handled.
+    """
+    profile = _CURRENT.get()
+    if profile is None:
+        yield {}
+        return
+
+    record = {"name": name, "depth": profile._depth, "ms": None, "rows": rows}
+    profile.spans.append(record)
+
+    tracing = profile.allocations and tracemalloc.is_tracing()
+    if tracing:
+        alloc_before = tracemalloc.get_traced_memory()[0]
+
+    profile._depth += 1
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["ms"] = round((time.perf_counter() - started) * 1000, 3)
+        profile._depth -= 1
+
+        if tracing:
+            alloc_after = tracemalloc.get_traced_memory()[0]
+            record["alloc_kb"] = round((alloc_after - alloc_before) / 1024, 1)
+
+
+def profiled(
+    name: str | None = None,
+    rows: Callable[[object], int | None] | None = None,
+):
+    """
+    Decorator: run the function inside a span named `name` (default
+    "<module>.<function>"). Row count comes from `rows(result)`, or
+    the result's length when it is a frame or array.
+    """
+    count = rows or _row_count
+
+    def decorate(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _CURRENT.get() is None:
+                return fn(*args, **kwargs)
+
+            with span(label) as record:
+                result = fn(*args, **kwargs)
+                record["rows"] = count(result)
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+def enable_json_log(level: int = logging.INFO) -> None:
+    """
+    Send run summaries to stderr as bare JSON lines. Idempotent, so it
+    is safe to call on every rerun.
+    """
+    if any(getattr(h, "_run_profile", False) for h in logger.handlers):
+        return
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._run_profile = True
+
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def _row_count(result) -> int | None:
+    shape = getattr(result, "shape", None)
+    if shape:
+        return int(shape[0])
+    return None
@@ -18,3 +18,35 @@ def rank_by_week(
     )
 
     return df
+
+
+def rank_many_by_week(
+    df: pd.DataFrame,
+    rank_cols: dict[str, str],
+    ascending: bool,
+    decimals: int | None = None,
+) -> pd.DataFrame:
+    """
+    Dense rank sites per week for several variables at once.
+
+    rank_cols maps value column -> rank column. Equivalent to calling
+    rank_by_week once per pair, but groups by week a single time and
+    copies the frame once. With `decimals`, values are compared rounded
+    to that many decimals (the value columns themselves are unchanged).
+    """
+    df = df.copy()
+
+    values = df[list(rank_cols)]
+    if decimals is not None:
+        values = values.round(decimals)
+
+    ranks = (
+        values.groupby(df["week_bin"])
+          .rank(method="dense", ascending=ascending)
+          .astype(int)
+    )
+
+    for value_col, rank_col in rank_cols.items():
+        df[rank_col] = ranks[value_col]
+
+    return df
@@ -4,12 +4,13 @@ transforms.py
 Pure data transformations only.
 
 Responsibilities:
-- Filter data by week
+- Filter data by week (mask scan, or slice via week partitions)
 - Aggregate across years (if needed)
 - Build site × week matrices
 - Normalize values per week
 - Compute ranks (optional)
-- Compute mean value per site (planning / prioritisation)
+- Compute mean / worst-case value per site (planning / prioritisation)
+- Summarise sites over a week range
 - Classify suitability values (for maps / alerts)
 
 NO visualization logic
@@ -17,24 +18,87 @@ NO thresholds hardcoded (config-driven)
 NO Streamlit / Plotly imports
 """
 
+from typing import NamedTuple
+
+import numpy as np
 import pandas as pd
 from app.config import SUITABILITY_CLASSES
+from app.cube import SiteWeekCube
+from app.profiling import profiled
+
+
+# Site means are compared at this precision: the float32 planes carry
+# ~7 significant digits, and the cube's prefix sums and a groupby add
+# different rounding noise below that.
+MEAN_DECIMALS = 6
 
 
 # -----------------------------
 # Filtering
 # -----------------------------
+class WeekPartitions(NamedTuple):
+    """
+    Row offsets of each week in a table sorted by week_bin.
+
+    Rows of weeks[i] are offsets[i]:offsets[i + 1].
+    """
+    weeks: np.ndarray
+    offsets: np.ndarray
+
+
+def week_partitions(week_bin) -> WeekPartitions | None:
+    """
+    Build week partition offsets, or None if rows are not week-sorted.
+    """
+    week_bin = np.asarray(week_bin)
+    if np.any(week_bin[1:] < week_bin[:-1]):
+        return None
+
+    weeks, starts = np.unique(week_bin, return_index=True)
+    return WeekPartitions(weeks, np.append(starts, len(week_bin)))
+
+
+def _contiguous_span(weeks) -> tuple[int, int] | None:
+    """
+    (lo, hi) if `weeks` covers every integer week from lo to hi.
+    """
+    weeks = set(weeks)
+    if not weeks:
+        return None
+
+    lo, hi = min(weeks), max(weeks)
+    if len(weeks) != hi - lo + 1:
+        return None
+
+    return int(lo), int(hi)
+
+
+@profiled()
 def filter_weeks(
     df: pd.DataFrame,
-    weeks: list[int] | None = None
+    weeks: list[int] | None = None,
+    partitions: WeekPartitions | None = None,
 ) -> pd.DataFrame:
     """
     Filter dataframe to a subset of weeks.
+
+    With partitions (from week_partitions over the same rows) and a
+    contiguous week range, the result is a zero-copy row slice instead
+    of a boolean-mask scan.
+
+    The result may share memory with `df`; treat it as read-only.
     """
     if weeks is None:
         return df
 
-    return df[df["week_bin"].isin(weeks)].copy()
+    span = _contiguous_span(weeks) if partitions is not None else None
+    if span is not None:
+        lo, hi = span
+        a = np.searchsorted(partitions.weeks, lo, side="left")
+        b = np.searchsorted(partitions.weeks, hi, side="right")
+        return df.iloc[partitions.offsets[a]:partitions.offsets[b]]
+
+    return df[df["week_bin"].isin(weeks)]
 
 
 # -----------------------------
@@ -58,7 +122,7 @@ def aggregate_site_week(
 
     return (
         df
-        .groupby(["site_name", "week_bin"], as_index=False)
+        .groupby(["site_name", "week_bin"], as_index=False, observed=True)
         .agg({value_col: agg})
     )
 
@@ -66,9 +130,11 @@ def aggregate_site_week(
 # -----------------------------
 # Matrix construction
 # -----------------------------
+@profiled()
 def build_site_week_matrix(
     df: pd.DataFrame,
-    value_col: str
+    value_col: str,
+    cube: SiteWeekCube | None = None,
 ) -> pd.DataFrame:
     """
     Build a site × week matrix WITHOUT dropping sparse sites.
@@ -77,7 +143,13 @@ def build_site_week_matrix(
     - all sites present in df
     - all weeks present in df
     - rows that are entirely NaN
+
+    If a cube built from the same dataset is given, the matrix is a
+    view of its plane for `value_col` (no pivot).
     """
+    if cube is not None and cube.has(value_col):
+        return cube.matrix(value_col)
+
     required = {"site_name", "week_bin", value_col}
     missing = required - set(df.columns)
     if missing:
@@ -155,10 +227,28 @@ def rank_per_week(
 # -----------------------------
 # Planning / prioritisation
 # -----------------------------
+def _week_span(
+    weeks: set[int] | None,
+    cube: SiteWeekCube | None,
+) -> tuple[int, int] | None:
+    """
+    (lo, hi) if `weeks` is a contiguous range the cube can answer.
+    """
+    if cube is None:
+        return None
+
+    if weeks is None:
+        return int(cube.weeks[0]), int(cube.weeks[-1])
+
+    return _contiguous_span(weeks)
+
+
+@profiled()
 def mean_per_site(
     df: pd.DataFrame,
     value_col: str,
-    weeks: set[int] | None = None
+    weeks: set[int] | None = None,
+    cube: SiteWeekCube | None = None,
 ) -> pd.Series:
     """
     Compute mean value per site across selected weeks.
@@ -166,20 +256,157 @@ def mean_per_site(
     Intended for:
     - prioritising sites over a season
     - selecting top-N sites
+
+    With a cube and a contiguous week range, the means come from its
+    prefix-sum index (O(sites)) instead of a filter + groupby. Both
+    give the same order: means are compared at MEAN_DECIMALS and ties
+    go to site_name order.
+    """
+    span = _week_span(weeks, cube)
+    if span is not None and cube.has(value_col):
+        means, _ = cube.range_mean(value_col, *span)
+        means = pd.Series(
+            means,
+            index=pd.Index(cube.site_names, name="site_name"),
+            name=value_col,
+        )
+    else:
+        data = df
+
+        if weeks is not None:
+            data = data[data["week_bin"].isin(weeks)]
+
+        if value_col not in data.columns:
+            raise ValueError(f"Column '{value_col}' not found")
+
+        # float64 accumulation, like the cube's prefix sums
+        means = (
+            data[value_col]
+            .astype("float64")
+            .groupby(data["site_name"], observed=True)
+            .mean()
+        )
+
+    return means.sort_index().sort_values(
+        ascending=False,
+        kind="stable",
+        key=lambda m: m.round(MEAN_DECIMALS),
+    )
+
+
+@profiled()
+def worst_case_per_site(
+    df: pd.DataFrame,
+    value_col: str,
+    how: str,
+    weeks: set[int] | None = None,
+    cube: SiteWeekCube | None = None,
+) -> pd.Series:
+    """
+    Compute the worst-case (max or min) value per site across weeks.
+
+    Ordered best first: smallest maxima / largest minima lead; ties go
+    to site_name order.
+
+    With a cube and a contiguous week range, the extremes come from its
+    sparse-table index (O(1) per site) instead of a filter + groupby.
     """
-    data = df
+    if how not in ("max", "min"):
+        raise ValueError(f"Unknown worst case '{how}'")
+
+    span = _week_span(weeks, cube)
+    if span is not None and cube.has(value_col):
+        scores = pd.Series(
+            cube.range_extreme(value_col, *span, how=how),
+            index=pd.Index(cube.site_names, name="site_name"),
+            name=value_col,
+        )
+    else:
+        data = df
+        if weeks is not None:
+            data = data[data["week_bin"].isin(weeks)]
+
+        if value_col not in data.columns:
+            raise ValueError(f"Column '{value_col}' not found")
+
+        scores = data.groupby("site_name", observed=True)[value_col].agg(how)
+
+    return scores.sort_index().sort_values(
+        ascending=(how == "max"),
+        kind="stable",
+    )
 
+
+@profiled()
+def summarise_sites(
+    df: pd.DataFrame,
+    value_col: str,
+    sites: list[str],
+    weeks: set[int] | None = None,
+    cube: SiteWeekCube | None = None,
+    agg: str = "mean",
+) -> pd.DataFrame:
+    """
+    Aggregate value and number of weeks with data per site, best first.
+
+    agg:
+    - mean : higher is better
+    - max  : worst-case maximum, lower is better
+    - min  : worst-case minimum, higher is better
+
+    Columns: state, site_name, <agg>, weeks. Means are compared at
+    MEAN_DECIMALS; ties keep state, site_name order.
+    """
+    if agg not in ("mean", "max", "min"):
+        raise ValueError(f"Unknown aggregation '{agg}'")
+
+    span = _week_span(weeks, cube)
+    if span is not None and cube.has(value_col):
+        means, counts = cube.range_mean(value_col, *span)
+        if agg == "mean":
+            values = means
+        else:
+            values = cube.range_extreme(value_col, *span, how=agg)
+
+        summary = pd.DataFrame(
+            {
+                "state": cube.site_states,
+                "site_name": cube.site_names,
+                agg: values,
+                "weeks": counts,
+            }
+        )
+        keep = summary["site_name"].isin(sites) & (summary["weeks"] > 0)
+
+        return _sort_summary(
+            summary[keep].sort_values(["state", "site_name"]), agg
+        )
+
+    data = df[df["site_name"].isin(sites)]
     if weeks is not None:
         data = data[data["week_bin"].isin(weeks)]
 
-    if value_col not in data.columns:
-        raise ValueError(f"Column '{value_col}' not found")
-
-    return (
+    summary = (
         data
-        .groupby("site_name")[value_col]
-        .mean()
-        .sort_values(ascending=False)
+        .astype({value_col: "float64"})
+        .groupby(["state", "site_name"], as_index=False, observed=True)[
+            value_col
+        ]
+        .agg(**{agg: agg}, weeks="count")
+    )
+    return _sort_summary(summary, agg)
+
+
+def _sort_summary(summary: pd.DataFrame, agg: str) -> pd.DataFrame:
+    """
+    Best first, keeping the current order among ties (means compared
+    at MEAN_DECIMALS, as in mean_per_site).
+    """
+    return summary.sort_values(
+        agg,
+        ascending=agg == "max",
+        kind="stable",
+        key=(lambda m: m.round(MEAN_DECIMALS)) if agg == "mean" else None,
     )
 
 
@@ -200,3 +427,64 @@ def classify_suitability(value: float) -> dict | None:
             return cls
 
     return None
+
+
+def _compile_suitability_classes(classes: list[dict]) -> dict:
+    """
+    Precompute sorted class boundaries for vectorised classification.
+
+    Classes must not overlap (so "first match" and "interval lookup"
+    agree).
+    """
+    order = sorted(range(len(classes)), key=lambda i: classes[i]["min"])
+    mins = np.array([classes[i]["min"] for i in order], dtype=float)
+    maxs = np.array([classes[i]["max"] for i in order], dtype=float)
+
+    if np.any(mins[1:] < maxs[:-1]):
+        raise ValueError("SUITABILITY_CLASSES must not overlap")
+
+    # Trailing sentinel entries are what class index -1 picks up
+    return {
+        "order": np.array(order, dtype=np.intp),
+        "mins": mins,
+        "maxs": maxs,
+        "colors": np.array([c["color"] for c in classes] + [""], dtype=object),
+        "sizes": np.array([c["size"] for c in classes] + [0]),
+    }
+
+
+_SUITABILITY_LOOKUP = _compile_suitability_classes(SUITABILITY_CLASSES)
+
+
+@profiled(rows=lambda result: len(result[0]))
+def classify_suitability_array(
+    values,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorised classify_suitability over an array of values.
+
+    Returns (class_index, colors, sizes), where class_index points into
+    SUITABILITY_CLASSES and is -1 for unsuitable values (<= 0, NaN or
+    outside every class); those get color "" and size 0.
+    """
+    lookup = _SUITABILITY_LOOKUP
+    values = np.asarray(values, dtype=float)
+
+    # Class with the greatest lower bound <= value
+    pos = np.searchsorted(lookup["mins"], values, side="right") - 1
+    pos_safe = np.clip(pos, 0, len(lookup["mins"]) - 1)
+
+    with np.errstate(invalid="ignore"):
+        valid = (
+            (pos >= 0)
+            & (values > 0)
+            & (values < lookup["maxs"][pos_safe])
+        )
+
+    class_index = np.where(valid, lookup["order"][pos_safe], -1)
+
+    return (
+        class_index,
+        lookup["colors"][class_index],
+        lookup["sizes"][class_index],
+    )
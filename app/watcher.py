@@ -0,0 +1,235 @@
+"""
+watcher.py
+
+Background watcher over the data directory.
+
+Responsible ONLY for:
+- Polling the registered source files (derived tables, metrics CSVs,
+  sites_fixed.csv) for changes (mtime + size)
+- Mapping each changed file to the datasets built from it
+- Evicting just those datasets (columns, cubes, week partitions), their
+  built figures (heatmaps, maps, animated maps) and stale year-window
+  tables
+- Optionally reloading the evicted datasets and rebuilding stale
+  metric stores in the background, so the next request does not pay
+  the cold load
+
+A file is acted on once its signature has held still for one poll, so
+files copied in place (not replaced atomically) are not read half
+written. Polling needs no extra dependency and costs one stat() per
+file per interval.
+
+NO business logic
+NO Streamlit imports
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Hashable
+
+from app.data_loader import (
+    DERIVED_DIR,
+    DIMENSIONS_DIR,
+    METRICS_DIR,
+    _METRIC_DATASETS,
+    _SPATIAL_DATASETS,
+    _file_signature,
+)
+from app.dataset import evict_datasets, prewarm_dataset
+from app.figure_cache import get_figure_cache
+from app.metric_store import refresh_metric_stores
+from app.partials import evict_year_tables, parse_year_window
+
+
+logger = logging.getLogger(__name__)
+
+# (kind, window) -> does the dataset depend on the file?
+Dependents = Callable[[str, str], bool]
+
+
+def watched_files() -> dict[Path, Dependents]:
+    """
+    Every source file the app loads from, with the datasets built on it.
+    """
+    files: dict[Path, Dependents] = {
+        # Merged into every dataset
+        DIMENSIONS_DIR / "sites_fixed.csv": lambda kind, window: True,
+    }
+
+    for window, name in _SPATIAL_DATASETS.items():
+        files[DERIVED_DIR / name] = (
+            lambda kind, w, window=window: kind == "spatial" and w == window
+        )
+
+    for window, name in _METRIC_DATASETS.items():
+        # Year windows combine partials built from every metrics CSV
+        files[METRICS_DIR / name] = (
+            lambda kind, w, window=window: (
+                (kind == "metrics" and w == window)
+                or parse_year_window(w) is not None
+            )
+        )
+
+    return files
+
+
+def figure_key_matcher(dependents: Dependents) -> Callable[[Hashable], bool]:
+    """
+    Figure cache keys are (figure, dataset_key, data_version, ...);
+    figures are always built from spatial datasets.
+    """
+    def matches(key: Hashable) -> bool:
+        return (
+            isinstance(key, tuple)
+            and len(key) > 1
+            and isinstance(key[1], str)
+            and dependents("spatial", key[1])
+        )
+
+    return matches
+
+
+class DataWatcher:
+    """
+    Polls the watched files on a daemon thread and invalidates the
+    datasets and figures that depend on whatever changed.
+    """
+
+    def __init__(self, interval: float = 2.0, prewarm: bool = False):
+        self.interval = interval
+        self.prewarm = prewarm
+
+        self._files = watched_files()
+        self._seen = self._snapshot()
+        self._pending: dict[Path, list[int] | None] = {}
+
+        self._polls = 0
+        self._changes: list[dict] = []
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self) -> "DataWatcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="data-watcher",
+                daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Data watcher poll failed")
+
+    # -----------------------------
+    # Polling
+    # -----------------------------
+    def poll(self) -> list[Path]:
+        """
+        Check every watched file once; invalidate for the files whose
+        change has settled. Returns those files.
+        """
+        current = self._snapshot()
+        settled = []
+
+        with self._lock:
+            self._polls += 1
+
+            for path, signature in current.items():
+                if signature == self._seen[path]:
+                    self._pending.pop(path, None)
+                elif self._pending.get(path, signature) != signature:
+                    # Still being written: wait for it to settle
+                    self._pending[path] = signature
+                elif path in self._pending:
+                    settled.append(path)
+                    self._pending.pop(path)
+                    self._seen[path] = signature
+                else:
+                    self._pending[path] = signature
+
+        if settled:
+            self.invalidate(settled)
+
+        return settled
+
+    def invalidate(self, paths: list[Path]) -> dict:
+        """
+        Evict (and optionally reload) everything built from `paths`.
+        """
+        predicates = [self._files[p] for p in paths]
+
+        def dependents(kind: str, window: str) -> bool:
+            return any(p(kind, window) for p in predicates)
+
+        started = time.perf_counter()
+        evicted = evict_datasets(dependents)
+        figures = get_figure_cache().evict(figure_key_matcher(dependents))
+        year_tables = evict_year_tables()
+
+        if self.prewarm:
+            for old in evicted:
+                try:
+                    prewarm_dataset(old)
+                except Exception:
+                    logger.exception(
+                        "Prewarming %s/%s failed", old.kind, old.window
+                    )
+
+            try:
+                refresh_metric_stores()
+            except Exception:
+                logger.exception("Refreshing metric stores failed")
+
+        change = {
+            "time": time.time(),
+            "files": [p.name for p in paths],
+            "datasets": [f"{d.kind}/{d.window}" for d in evicted],
+            "figures": figures,
+            "year_tables": year_tables,
+            "prewarmed": self.prewarm,
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        logger.info("Data changed: %s", change)
+
+        with self._lock:
+            self._changes = [change, *self._changes][:20]
+
+        return change
+
+    def _snapshot(self) -> dict[Path, list[int] | None]:
+        return {
+            path: _file_signature(path) if path.exists() else None
+            for path in self._files
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None
+                and self._thread.is_alive(),
+                "interval_s": self.interval,
+                "files": len(self._files),
+                "polls": self._polls,
+                "pending": [p.name for p in self._pending],
+                "recent_changes": list(self._changes),
+            }
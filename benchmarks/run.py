@@ -0,0 +1,316 @@
+"""
+run.py
+
+Benchmark suite for the data and plotting paths, over synthetic data.
+
+For every (sites, years) scale a synthetic data tree is generated (see
+synthetic.py) and the suite runs in a fresh subprocess pointed at it
+via SITE_SUITABILITY_DATA_DIR, so caches and imports never leak
+between scales. Results are written as JSON; pass --baseline to flag
+cases whose median slowed down by more than --tolerance.
+
+Usage:
+    python -m benchmarks.run --sites 100 1000 --years 1 5 \\
+        --out benchmarks/results/latest.json \\
+        --baseline benchmarks/results/baseline.json
+
+benchmarks/results/baseline.json is a committed reference run at the
+smallest scale. Timings are machine-specific: on other hardware, write
+a fresh baseline from a known-good commit first:
+    python -m benchmarks.run --sites 100 --years 1 \\
+        --out benchmarks/results/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import product
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+WINDOW = "full"
+DEFAULT_TOLERANCE = 0.25
+
+
+# -----------------------------
+# Suite (runs inside the worker)
+# -----------------------------
+def _cases():
+    """
+    Yield (name, callable) pairs. Setup happens here, outside timing.
+    """
+    import logging
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    from app.config import variable_columns
+    from app.cube import SiteWeekCube
+    from app.data_loader import load_with_sites
+    from app.plot_map import plot_suitability_map
+    from app.plotting import plot_heatmap
+    from app.ranking import rank_by_week
+    from app.transforms import (
+        build_site_week_matrix,
+        mean_per_site,
+        normalize_per_week,
+        rank_per_week,
+        week_partitions,
+    )
+
+    yield "load_with_sites[spatial,csv]", lambda: load_with_sites(
+        "spatial", WINDOW, use_cache=False
+    )
+    yield "load_with_sites[metrics,csv]", lambda: load_with_sites(
+        "metrics", WINDOW, use_cache=False
+    )
+
+    # Warm the columnar caches, then time cached loads
+    spatial = load_with_sites("spatial", WINDOW)
+    load_with_sites("metrics", WINDOW)
+
+    yield "load_with_sites[spatial,cache]", lambda: load_with_sites(
+        "spatial", WINDOW
+    )
+    yield "load_with_sites[metrics,cache]", lambda: load_with_sites(
+        "metrics", WINDOW
+    )
+
+    value_col = "pct_viability"
+    columns = variable_columns("suitability")
+    cube = SiteWeekCube.from_frame(spatial, columns)
+    matrix = build_site_week_matrix(spatial, value_col)
+    sites = set(spatial["site_name"])
+    weeks = set(range(10, 41))
+
+    yield "cube.from_frame", lambda: SiteWeekCube.from_frame(spatial, columns)
+    yield "build_site_week_matrix[pivot]", lambda: build_site_week_matrix(
+        spatial, value_col
+    )
+    yield "build_site_week_matrix[cube]", lambda: build_site_week_matrix(
+        spatial, value_col, cube=cube
+    )
+    yield "normalize_per_week", lambda: normalize_per_week(matrix)
+    yield "rank_per_week", lambda: rank_per_week(matrix)
+    yield "mean_per_site[groupby]", lambda: mean_per_site(
+        spatial, value_col, weeks=weeks
+    )
+    yield "mean_per_site[cube]", lambda: mean_per_site(
+        spatial, value_col, weeks=weeks, cube=cube
+    )
+    yield "rank_by_week", lambda: rank_by_week(
+        spatial, value_col, "suitability_rank", ascending=False
+    )
+
+    for overlay in ("none", "value", "rank", "winner"):
+        yield f"plot_heatmap[{overlay}]", (
+            lambda overlay=overlay: plot_heatmap(
+                spatial,
+                "suitability",
+                overlay,
+                active_weeks=weeks,
+                active_sites=sites,
+                cube=cube,
+            )
+        )
+
+    partitions = week_partitions(spatial["week_bin"])
+    yield "plot_suitability_map", lambda: plot_suitability_map(
+        spatial, "suitability", week=26, partitions=partitions
+    )
+
+
+def run_suite(repeat: int) -> list[dict]:
+    results = []
+
+    for name, fn in _cases():
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - started) * 1000)
+
+        results.append(
+            {
+                "case": name,
+                "repeat": repeat,
+                "min_ms": round(min(times), 3),
+                "median_ms": round(statistics.median(times), 3),
+                "max_ms": round(max(times), 3),
+            }
+        )
+
+    return results
+
+
+# -----------------------------
+# Orchestration
+# -----------------------------
+def run_scale(
+    n_sites: int,
+    n_years: int,
+    repeat: int,
+    data_root: Path,
+    seed: int = 0,
+) -> list[dict]:
+    from benchmarks.synthetic import generate
+
+    data_dir = data_root / f"sites{n_sites}_years{n_years}"
+    if not (data_dir / "dimensions" / "sites_fixed.csv").exists():
+        print(f"generating {data_dir.name} ...", file=sys.stderr)
+        generate(data_dir, n_sites, n_years, seed=seed)
+
+    env = dict(os.environ, SITE_SUITABILITY_DATA_DIR=str(data_dir))
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--worker",
+         "--repeat", str(repeat)],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    results = json.loads(proc.stdout)
+    for r in results:
+        r.update(sites=n_sites, years=n_years)
+    return results
+
+
+def compare(
+    results: list[dict],
+    baseline: dict,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[dict]:
+    """
+    Cases whose median is more than `tolerance` slower than baseline.
+    """
+    def key(r):
+        return r["case"], r["sites"], r["years"]
+
+    before = {key(r): r for r in baseline["results"]}
+    regressions = []
+
+    for r in results:
+        old = before.get(key(r))
+        if old is None or old["median_ms"] <= 0:
+            continue
+
+        ratio = r["median_ms"] / old["median_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {
+                    "case": r["case"],
+                    "sites": r["sites"],
+                    "years": r["years"],
+                    "baseline_ms": old["median_ms"],
+                    "median_ms": r["median_ms"],
+                    "ratio": round(ratio, 3),
+                }
+            )
+
+    return regressions
+
+
+def _meta() -> dict:
+    import numpy as np
+    import pandas as pd
+    import plotly
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def _print_table(results: list[dict]) -> None:
+    for r in results:
+        print(
+            f"{r['sites']:>6} sites {r['years']:>3} y  "
+            f"{r['case']:<34} {r['median_ms']:>10.2f} ms",
+            file=sys.stderr,
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sites", type=int, nargs="+", default=[100])
+    parser.add_argument("--years", type=int, nargs="+", default=[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--out",
+        type=Path,
+        default=PROJECT_ROOT / "benchmarks" / "results" / "latest.json",
+    )
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--data-root",
+        type=Path,
+        help="Keep generated data here and reuse it (default: temp dir)",
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        json.dump(run_suite(args.repeat), sys.stdout)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_root = args.data_root or Path(tmp)
+
+        results = []
+        for n_sites, n_years in product(args.sites, args.years):
+            results += run_scale(n_sites, n_years, args.repeat, data_root,
+                                 seed=args.seed)
+
+    _print_table(results)
+
+    report = {"meta": _meta(), "results": results}
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        report["regressions"] = compare(results, baseline, args.tolerance)
+
+        for r in report["regressions"]:
+            print(
+                f"REGRESSION {r['case']} ({r['sites']} sites, "
+                f"{r['years']} y): {r['baseline_ms']:.2f} -> "
+                f"{r['median_ms']:.2f} ms (x{r['ratio']})",
+                file=sys.stderr,
+            )
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2))
+    print(args.out)
+
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+synthetic.py
+
+Synthetic data trees for benchmarking, at configurable scale.
+
+Writes the same layout, file names and columns as data/:
+- dimensions/sites_fixed.csv
+- metrics/Weekly_Master_*.csv   (site × year × week)
+- derived/weekly_spatial_*.csv  (site × week, aggregated over years)
+
+for the "full" window (every generated year) and the "2025" window
+(the latest year). Years are generated and written one at a time, so
+memory stays at O(sites × weeks) whatever the number of years.
+
+Usage:
+    python -m benchmarks.synthetic --sites 1000 --years 5 --out /tmp/synth
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.build_derived import (
+    SPATIAL_AGGREGATIONS,
+    VARIABLE_GROUPS,
+    add_ranks_and_decisions,
+    assemble_spatial_table,
+)
+from app.data_loader import _METRIC_DATASETS, _SPATIAL_DATASETS
+
+N_WEEKS = 52
+LAST_YEAR = 2025
+
+STATES = ["NE", "IA", "KS", "SD", "ND", "MN", "MO", "OK", "TX", "CO", "WY", "IL"]
+
+# Metrics CSV column order: weather, observation counts, suitability
+WEATHER_COLUMNS = [
+    "t2m_08",
+    "t2m_mean_08_18",
+    "t2m_min_08_18",
+    "t2m_max_08_18",
+    "t2m_absmax_08_18",
+    "t2m_absmin_08_18",
+    "rh_08",
+    "rh_mean_08_18",
+    "rh_absmax_08_18",
+    "wind_mean",
+    "wind_min",
+    "wind_max",
+    "wind_absmax",
+]
+COUNT_COLUMNS = ["n_obs", "n_days"]
+SUITABILITY_COLUMNS = [
+    "pct_t2m_08_18",
+    "pct_rh_08_18",
+    "pct_wind_max",
+    "pct_viability",
+]
+
+METRIC_COLUMNS = WEATHER_COLUMNS + SUITABILITY_COLUMNS
+
+
+def generate(
+    out_dir: Path,
+    n_sites: int,
+    n_years: int,
+    seed: int = 0,
+) -> Path:
+    """
+    Write a synthetic data tree under `out_dir`; returns `out_dir`.
+    """
+    out_dir = Path(out_dir)
+    for sub in ("dimensions", "metrics", "derived"):
+        (out_dir / sub).mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    sites = _sites(n_sites, rng)
+    sites.to_csv(out_dir / "dimensions" / "sites_fixed.csv", index=False)
+
+    years = range(LAST_YEAR - n_years + 1, LAST_YEAR + 1)
+    full_path = out_dir / "metrics" / _METRIC_DATASETS["full"]
+    latest_path = out_dir / "metrics" / _METRIC_DATASETS[str(LAST_YEAR)]
+
+    rollup = _Rollup(n_sites)
+    latest = None
+
+    for i, year in enumerate(years):
+        planes = _year_planes(sites["Lat"].to_numpy(), year, rng)
+        frame = _metrics_frame(sites["Site ID"].to_numpy(), year, planes)
+
+        frame.to_csv(full_path, mode="w" if i == 0 else "a",
+                     header=i == 0, index=False)
+        rollup.add(planes)
+
+        if year == LAST_YEAR:
+            frame.to_csv(latest_path, index=False)
+            latest = _Rollup(n_sites)
+            latest.add(planes)
+
+    for window, agg in (("full", rollup), (str(LAST_YEAR), latest)):
+        _spatial_frame(window, sites, agg).to_csv(
+            out_dir / "derived" / _SPATIAL_DATASETS[window], index=False
+        )
+
+    return out_dir
+
+
+# -----------------------------
+# Sites
+# -----------------------------
+def _sites(n_sites: int, rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Site ID": np.arange(1, n_sites + 1),
+            "Site Name": [f"SYNTH SITE {i:05d}" for i in range(1, n_sites + 1)],
+            "Lat": rng.uniform(30.0, 48.0, n_sites).round(6),
+            "Long": rng.uniform(-120.0, -85.0, n_sites).round(6),
+            "State": rng.choice(STATES, n_sites),
+        }
+    )
+
+
+# -----------------------------
+# Weekly metrics
+# -----------------------------
+def _year_planes(
+    lat: np.ndarray,
+    year: int,
+    rng: np.random.Generator,
+) -> dict[str, np.ndarray]:
+    """
+    float64[sites, weeks] per metric column for one year.
+    """
+    shape = (len(lat), N_WEEKS)
+    week = np.arange(1, N_WEEKS + 1)[None, :]
+
+    def noise(scale):
+        return rng.normal(0.0, scale, shape)
+
+    season = np.sin(2 * np.pi * (week - 16) / N_WEEKS)
+    t_mean = 12.0 - 0.6 * (lat[:, None] - 30.0) + 16.0 * season + noise(3.0)
+    rh_mean = np.clip(62.0 - 12.0 * season + noise(8.0), 10.0, 98.0)
+    wind_mean = np.clip(4.5 - 1.0 * season + noise(1.0), 0.5, None)
+
+    # Share of the 7 days inside the working envelope
+    def share(p):
+        return rng.binomial(7, np.clip(p, 0.0, 1.0)) / 7
+
+    pct_t = share(1.0 - np.abs(t_mean - 18.0) / 16.0)
+    pct_rh = share(1.2 - rh_mean / 100.0)
+    pct_wind = share(1.4 - wind_mean / 10.0)
+
+    return {
+        "t2m_08": t_mean - 3.0 + noise(1.0),
+        "t2m_mean_08_18": t_mean,
+        "t2m_min_08_18": t_mean - 4.0 - np.abs(noise(1.0)),
+        "t2m_max_08_18": t_mean + 4.0 + np.abs(noise(1.0)),
+        "t2m_absmax_08_18": t_mean + 8.0 + np.abs(noise(2.0)),
+        "t2m_absmin_08_18": t_mean - 10.0 - np.abs(noise(3.0)),
+        "rh_08": np.clip(rh_mean + 8.0 + noise(3.0), 5.0, 100.0),
+        "rh_mean_08_18": rh_mean,
+        "rh_absmax_08_18": np.clip(rh_mean + 15.0 + np.abs(noise(4.0)), 5.0, 100.0),
+        "wind_mean": wind_mean,
+        "wind_min": wind_mean * 0.5,
+        "wind_max": wind_mean * 1.5,
+        "wind_absmax": wind_mean * 2.0 + np.abs(noise(1.5)),
+        "pct_t2m_08_18": pct_t,
+        "pct_rh_08_18": pct_rh,
+        "pct_wind_max": pct_wind,
+        "pct_viability": np.minimum(np.minimum(pct_t, pct_rh), pct_wind),
+    }
+
+
+def _metrics_frame(
+    site_ids: np.ndarray,
+    year: int,
+    planes: dict[str, np.ndarray],
+) -> pd.DataFrame:
+    n_sites = len(site_ids)
+    start = date(year, 1, 1)
+    start_dates = np.array(
+        [(start + timedelta(weeks=w)).isoformat() for w in range(N_WEEKS)],
+        dtype=object,
+    )
+
+    data = {
+        "site_id": np.repeat(site_ids, N_WEEKS),
+        "year": np.full(n_sites * N_WEEKS, year),
+        "week_index": np.tile(np.arange(1, N_WEEKS + 1), n_sites),
+        "start_date": np.tile(start_dates, n_sites),
+    }
+    for col in WEATHER_COLUMNS:
+        data[col] = planes[col].ravel()
+
+    # Every synthetic week is fully observed
+    for col in COUNT_COLUMNS:
+        data[col] = 7
+
+    for col in SUITABILITY_COLUMNS:
+        data[col] = planes[col].ravel()
+
+    return pd.DataFrame(data)
+
+
+# -----------------------------
+# Spatial roll-ups
+# -----------------------------
+class _Rollup:
+    """
+    Running per site × week aggregates over years.
+    """
+
+    def __init__(self, n_sites: int):
+        self.n_years = 0
+        self.values = {
+            col: np.full(
+                (n_sites, N_WEEKS),
+                {"mean": 0.0, "max": -np.inf, "min": np.inf}[how],
+            )
+            for col, how in SPATIAL_AGGREGATIONS.items()
+        }
+
+    def add(self, planes: dict[str, np.ndarray]) -> None:
+        self.n_years += 1
+        for col, how in SPATIAL_AGGREGATIONS.items():
+            if how == "mean":
+                self.values[col] += planes[col]
+            elif how == "max":
+                np.maximum(self.values[col], planes[col], out=self.values[col])
+            else:
+                np.minimum(self.values[col], planes[col], out=self.values[col])
+
+    def result(self) -> dict[str, np.ndarray]:
+        return {
+            col: (
+                values / self.n_years
+                if SPATIAL_AGGREGATIONS[col] == "mean"
+                else values
+            )
+            for col, values in self.values.items()
+        }
+
+
+def _spatial_frame(
+    window: str,
+    sites: pd.DataFrame,
+    rollup: _Rollup,
+) -> pd.DataFrame:
+    """
+    The window's spatial table, ranked, ordered and laid out by
+    app.build_derived from the rolled-up planes.
+    """
+    planes = rollup.result()
+    n_sites = len(sites)
+
+    # Sorted by site_id, site_name, week_bin, like build_derived's groups
+    keys = pd.DataFrame(
+        {
+            "site_id": np.repeat(sites["Site ID"].to_numpy(), N_WEEKS),
+            "site_name": np.repeat(sites["Site Name"].to_numpy(), N_WEEKS),
+            "week_bin": np.tile(np.arange(1, N_WEEKS + 1), n_sites),
+        }
+    )
+
+    parts = {
+        group: keys.assign(**{col: planes[col].ravel() for col in columns})
+        for group, columns in VARIABLE_GROUPS.items()
+    }
+    parts["suitability"] = add_ranks_and_decisions(parts["suitability"])
+
+    return assemble_spatial_table(window, parts)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sites", type=int, default=100)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    generate(args.out, args.sites, args.years, seed=args.seed)
+    print(args.out)
+
+
+if __name__ == "__main__":
+    main()